@@ -46,20 +46,18 @@ class EclipseAttackSimulator:
                 mal_node.start()
                 time.sleep(0.1)
                 
-                # Đăng ký vào mạng
-                self.network_manager.register_node(
-                    node_id=mal_node.node_id,
-                    host=mal_node.host,
-                    port=mal_node.port,
-                    username=mal_node.username
-                )
-                
                 self.malicious_nodes.append(mal_node)
                 print(f"✓ Created malicious node {i+1}/{count}: {mal_node.username} (Port: {mal_node.port})")
                 
             except Exception as e:
                 print(f"✗ Failed to create malicious node {i+1}: {str(e)}")
         
+        # Đăng ký tất cả vào mạng với một lần ghi registry
+        self.network_manager.register_many([
+            {'node_id': node.node_id, 'host': node.host, 'port': node.port, 'username': node.username}
+            for node in self.malicious_nodes
+        ])
+        
         print(f"\n✅ Successfully created {len(self.malicious_nodes)} malicious nodes!")
         print("="*80 + "\n")
         
@@ -190,12 +188,13 @@ class EclipseAttackSimulator:
             print(f"✓ Target node restored\n")
         
         # Remove malicious nodes
-        for mal_node in self.malicious_nodes:
-            try:
-                self.network_manager.unregister_node(mal_node.node_id)
+        try:
+            # Xóa khỏi network (một lần ghi registry)
+            self.network_manager.unregister_many([node.node_id for node in self.malicious_nodes])
+            for mal_node in self.malicious_nodes:
                 print(f"✓ Removed {mal_node.username}")
-            except Exception as e:
-                print(f"✗ Error removing {mal_node.username}: {str(e)}")
+        except Exception as e:
+            print(f"✗ Error removing malicious nodes: {str(e)}")
         
         self.malicious_nodes.clear()
         self.target_node = None
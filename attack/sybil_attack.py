@@ -45,20 +45,18 @@ class SybilAttackSimulator:
                 sybil_node.start()
                 time.sleep(0.1)  # Đợi node khởi động
                 
-                # Đăng ký vào mạng
-                self.network_manager.register_node(
-                    node_id=sybil_node.node_id,
-                    host=sybil_node.host,
-                    port=sybil_node.port,
-                    username=sybil_node.username
-                )
-                
                 self.sybil_nodes.append(sybil_node)
                 print(f"✓ Created Sybil node {i+1}/{count}: {sybil_node.username} (Port: {sybil_node.port})")
                 
             except Exception as e:
                 print(f"✗ Failed to create Sybil node {i+1}: {str(e)}")
         
+        # Đăng ký tất cả vào mạng với một lần ghi registry
+        self.network_manager.register_many([
+            {'node_id': node.node_id, 'host': node.host, 'port': node.port, 'username': node.username}
+            for node in self.sybil_nodes
+        ])
+        
         print(f"\n✅ Successfully created {len(self.sybil_nodes)} Sybil nodes!")
         print(f"📊 Network size: {self.network_manager.get_network_size()} nodes")
         print("="*80 + "\n")
@@ -133,13 +131,13 @@ class SybilAttackSimulator:
         print("🧹 Cleaning up Sybil nodes...")
         print("="*80 + "\n")
         
-        for sybil_node in self.sybil_nodes:
-            try:
-                # Xóa khỏi network
-                self.network_manager.unregister_node(sybil_node.node_id)
+        try:
+            # Xóa khỏi network (một lần ghi registry)
+            self.network_manager.unregister_many([node.node_id for node in self.sybil_nodes])
+            for sybil_node in self.sybil_nodes:
                 print(f"✓ Removed {sybil_node.username}")
-            except Exception as e:
-                print(f"✗ Error removing {sybil_node.username}: {str(e)}")
+        except Exception as e:
+            print(f"✗ Error removing Sybil nodes: {str(e)}")
         
         self.sybil_nodes.clear()
         print("\n✅ Cleanup complete!")
@@ -5,6 +5,7 @@ import os
 import json
 import config
 from core.blockchain import Blockchain
+from core.block_store import BlockStore
 
 
 class UserManager:
@@ -29,6 +30,44 @@ class UserManager:
         """
         return os.path.join(self.accounts_dir, f"{username}.txt")
     
+    def get_block_store(self, username):
+        """
+        Lấy block store (append-only) chứa blockchain của tài khoản
+        
+        Args:
+            username (str): Tên người dùng
+        
+        Returns:
+            BlockStore: Block store của tài khoản
+        """
+        return BlockStore(os.path.join(self.accounts_dir, f"{username}.chain"))
+    
+    def _write_account(self, username, account_data):
+        """Ghi file tài khoản (chỉ credentials + metadata, không chứa blockchain)"""
+        with open(self.get_account_file(username), 'w', encoding='utf-8') as f:
+            json.dump(account_data, f, indent=2, ensure_ascii=False)
+    
+    def _read_account(self, username):
+        """
+        Đọc file tài khoản, tự động chuyển key 'blockchain' của định dạng cũ
+        sang block store
+        
+        Args:
+            username (str): Tên người dùng
+        
+        Returns:
+            dict: Dữ liệu tài khoản (credentials + metadata)
+        """
+        with open(self.get_account_file(username), 'r', encoding='utf-8') as f:
+            account_data = json.load(f)
+        
+        if 'blockchain' in account_data:
+            self.get_block_store(username).sync(account_data.pop('blockchain'))
+            self._write_account(username, account_data)
+            print(f"Migrated blockchain of {username} to block store")
+        
+        return account_data
+    
     def account_exists(self, username):
         """
         Kiểm tra tài khoản đã tồn tại chưa
@@ -70,15 +109,16 @@ class UserManager:
         account_data = {
             'username': username,
             'password': password,
-            'blockchain': blockchain.to_list(),
             'node_id': None,
             'created_at': blockchain.get_latest_block().timestamp
         }
         
-        # Lưu vào file
-        account_file = self.get_account_file(username)
-        with open(account_file, 'w', encoding='utf-8') as f:
-            json.dump(account_data, f, indent=2, ensure_ascii=False)
+        # Lưu vào file (blockchain lưu riêng trong block store)
+        self._write_account(username, account_data)
+        
+        store = self.get_block_store(username)
+        store.truncate(0)
+        store.sync(blockchain.chain)
         
         print(f"Account created: {username}")
         return True, "Registration successful!", blockchain.to_list()
@@ -99,9 +139,7 @@ class UserManager:
             return False, "Username does not exist!", None
         
         # Đọc dữ liệu tài khoản
-        account_file = self.get_account_file(username)
-        with open(account_file, 'r', encoding='utf-8') as f:
-            account_data = json.load(f)
+        account_data = self._read_account(username)
         
         # Kiểm tra mật khẩu
         if account_data['password'] != password:
@@ -116,7 +154,7 @@ class UserManager:
         
         Args:
             username (str): Tên người dùng
-            blockchain_data (list): Dữ liệu blockchain mới
+            blockchain_data (list): Dữ liệu blockchain mới (list of Block hoặc dict)
             node_id (str): Node ID mới
         
         Returns:
@@ -125,24 +163,54 @@ class UserManager:
         if not self.account_exists(username):
             return False
         
-        # Đọc dữ liệu hiện tại
-        account_file = self.get_account_file(username)
-        with open(account_file, 'r', encoding='utf-8') as f:
-            account_data = json.load(f)
+        account_data = self._read_account(username)
         
-        # Cập nhật
+        # Blockchain: chỉ ghi thêm các block mới (cắt phần fork nếu chain bị thay)
         if blockchain_data is not None:
-            account_data['blockchain'] = blockchain_data
+            self.get_block_store(username).sync(blockchain_data)
         
+        # Metadata: chỉ ghi lại file tài khoản khi thật sự thay đổi
         if node_id is not None:
-            account_data['node_id'] = node_id
-        
-        # Lưu lại
-        with open(account_file, 'w', encoding='utf-8') as f:
-            json.dump(account_data, f, indent=2, ensure_ascii=False)
+            if account_data.get('node_id') != node_id:
+                account_data['node_id'] = node_id
+                self._write_account(username, account_data)
         
         return True
     
+    def save_blockchain(self, username, blockchain):
+        """
+        Lưu blockchain của tài khoản (chỉ append các block chưa có trong store)
+        
+        Args:
+            username (str): Tên người dùng
+            blockchain (Blockchain): Blockchain cần lưu
+        
+        Returns:
+            bool: True nếu thành công
+        """
+        return self.update_account(username, blockchain_data=blockchain.chain)
+    
+    def load_blockchain(self, username):
+        """
+        Load blockchain của tài khoản từ block store (mmap, không giải mã trước)
+        
+        Args:
+            username (str): Tên người dùng
+        
+        Returns:
+            Blockchain: Blockchain (None nếu tài khoản chưa có block nào)
+        """
+        if not self.account_exists(username):
+            return None
+        
+        self._read_account(username)  # Migrate định dạng cũ nếu cần
+        store = self.get_block_store(username)
+        if len(store) == 0:
+            return None
+        
+        # Lazy: block chỉ được giải mã khi truy cập
+        return Blockchain.from_store(store, owner_address=username)
+    
     def get_account_data(self, username):
         """
         Lấy dữ liệu tài khoản
@@ -156,9 +224,7 @@ class UserManager:
         if not self.account_exists(username):
             return None
         
-        account_file = self.get_account_file(username)
-        with open(account_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self._read_account(username)
     
     def list_accounts(self):
         """
@@ -191,6 +257,7 @@ class UserManager:
         
         account_file = self.get_account_file(username)
         os.remove(account_file)
+        self.get_block_store(username).delete()
         print(f"Account deleted: {username}")
         return True
     
@@ -203,8 +270,8 @@ class UserManager:
         print("="*80)
         
         for username in accounts:
-            account_data = self.get_account_data(username)
-            chain_length = len(account_data['blockchain'])
+            self._read_account(username)  # Migrate định dạng cũ nếu cần
+            chain_length = len(self.get_block_store(username))
             print(f"  - {username} (Chain length: {chain_length})")
         
         print("="*80 + "\n")
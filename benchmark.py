@@ -0,0 +1,543 @@
+"""
+Benchmark - Đo hiệu năng các thành phần của hệ thống blockchain
+
+Usage:
+    python benchmark.py            # Chạy tất cả benchmarks
+    python benchmark.py mining     # Chỉ chạy benchmark mining
+"""
+import os
+import sys
+import time
+import config
+from core.block import Block
+from core.blockchain import Blockchain
+from core.transaction import Transaction
+from core.mining import HeaderHasher
+
+
+def make_block(index=1):
+    """Tạo block mẫu để benchmark"""
+    tx = Transaction(sender="Alice", receiver="Bob", amount=5, timestamp=1700000000.0)
+    return Block(index=index, transaction=tx, previous_hash="0" * 64, timestamp=1700000001.0, miner="Alice")
+
+
+def bench_hashing(count=200000):
+    """Hashes/sec: Block.calculate_hash (JSON mỗi nonce) vs HeaderHasher (midstate)"""
+    print("\n" + "="*80)
+    print(f"BENCHMARK: PoW hashing ({count:,} nonces)")
+    print("="*80)
+    
+    block = make_block()
+    start = time.perf_counter()
+    for nonce in range(count):
+        block.nonce = nonce
+        block.calculate_hash()
+    before = count / (time.perf_counter() - start)
+    
+    hasher = HeaderHasher(make_block().header_dict())
+    start = time.perf_counter()
+    hasher.search(64, 0, count)  # Độ khó không thể đạt -> thử đủ count nonce
+    after = count / (time.perf_counter() - start)
+    
+    print(f"  calculate_hash  {before:>12,.0f} H/s")
+    print(f"  HeaderHasher    {after:>12,.0f} H/s   speedup x{after / before:.2f}")
+    print("="*80 + "\n")
+
+
+def bench_mining(difficulty=5, blocks=3):
+    """Hash rate của mining theo số process"""
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Mining hash rate (difficulty {difficulty}, {blocks} blocks)")
+    print("="*80)
+    
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cpu_count})
+    baseline = None
+    
+    for workers in worker_counts:
+        total_nonces = 0
+        start = time.perf_counter()
+        
+        for i in range(blocks):
+            block = make_block(index=i + 1)
+            block.mine_block(difficulty, workers=workers)
+            total_nonces += block.nonce + 1
+        
+        elapsed = time.perf_counter() - start
+        rate = total_nonces / elapsed
+        baseline = baseline or rate
+        print(f"  workers={workers:<3} {rate:>12,.0f} H/s   speedup x{rate / baseline:.2f}")
+    
+    print("="*80 + "\n")
+
+
+def bench_block_throughput(transactions=200, difficulty=4):
+    """Throughput (tx/sec): block 1 giao dịch vs block nhiều giao dịch (Merkle root)"""
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Block throughput ({transactions} transactions, difficulty {difficulty})")
+    print("="*80)
+    
+    original_limit = config.MAX_BLOCK_TRANSACTIONS
+    results = {}
+    
+    try:
+        for label, limit in [('single-tx blocks', 1), ('batched blocks', original_limit)]:
+            config.MAX_BLOCK_TRANSACTIONS = limit
+            blockchain = Blockchain(owner_address="Alice")
+            blockchain.difficulty = difficulty
+            
+            for i in range(transactions):
+                blockchain.mempool.add(Transaction("System", f"User_{i}", 1, timestamp=1700000000.0 + i))
+            
+            start = time.perf_counter()
+            while blockchain.mempool:
+                blockchain.mine_pending_transactions("Miner")
+            elapsed = time.perf_counter() - start
+            
+            results[label] = transactions / elapsed
+            print(f"  {label:<18} {len(blockchain.chain) - 1:>4} blocks  {results[label]:>10,.1f} tx/s")
+    finally:
+        config.MAX_BLOCK_TRANSACTIONS = original_limit
+    
+    speedup = results['batched blocks'] / results['single-tx blocks']
+    print(f"  speedup x{speedup:.1f}")
+    print("="*80 + "\n")
+
+
+def build_chain(length, difficulty=1):
+    """Tạo blockchain dài `length` block (độ khó thấp để build nhanh)"""
+    blockchain = Blockchain(owner_address="Alice")
+    blockchain.difficulty = difficulty
+    
+    for i in range(length - 1):
+        blockchain.mempool.add(Transaction("System", f"User_{i}", 1, timestamp=1700000000.0 + i))
+        blockchain.mine_pending_transactions("Miner")
+    
+    return blockchain
+
+
+def bench_validation(lengths=(100, 1000, 5000), rounds=20):
+    """Chi phí validate lặp lại (sau mỗi block mới) theo độ dài chain"""
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Repeated is_chain_valid ({rounds} rounds, 1 new block per round)")
+    print("="*80)
+    
+    for length in lengths:
+        blockchain = build_chain(length)
+        
+        start = time.perf_counter()
+        blockchain.is_chain_valid(full=True)
+        full = time.perf_counter() - start
+        
+        cached = 0
+        for i in range(rounds):
+            blockchain.mempool.add(Transaction("System", f"Extra_{i}", 1, timestamp=1800000000.0 + i))
+            blockchain.mine_pending_transactions("Miner")
+            start = time.perf_counter()
+            blockchain.is_chain_valid()
+            cached += time.perf_counter() - start
+        
+        print(f"  length={length:<6} full: {full * 1000:>9.2f} ms   incremental: {cached / rounds * 1000:>7.3f} ms/call")
+    
+    print("="*80 + "\n")
+
+
+def bench_peer_client(requests_count=300):
+    """Latency mỗi request: kết nối mới mỗi lần (requests.get) vs PeerClient keep-alive"""
+    import requests
+    from network.node import Node
+    from network.peer_client import PeerClient
+    
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Peer request latency ({requests_count} x GET /ping)")
+    print("="*80)
+    
+    node = Node(username="BenchPeer")
+    node.start()
+    peer_url = node.get_url()
+    
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        requests.get(f"{peer_url}/ping", timeout=2)
+    fresh = (time.perf_counter() - start) / requests_count
+    
+    client = PeerClient()
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        client.get(peer_url, '/ping')
+    pooled = (time.perf_counter() - start) / requests_count
+    
+    print(f"  new connection   {fresh * 1000:>8.3f} ms/request")
+    print(f"  PeerClient       {pooled * 1000:>8.3f} ms/request   speedup x{fresh / pooled:.2f}")
+    print(f"  pool stats       {client.get_stats()}")
+    print("="*80 + "\n")
+
+
+def bench_registry(nodes=500, lookups=2000):
+    """NetworkManager: đọc lại file mỗi lần vs cache theo mtime/size/inode"""
+    import json
+    import tempfile
+    from network.network_manager import NetworkManager
+    
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Network registry reads ({nodes} nodes, {lookups} get_node calls)")
+    print("="*80)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        network_file = os.path.join(tmp, 'network_nodes.txt')
+        registry = {
+            f"node-{i}": {'node_id': f"node-{i}", 'host': '127.0.0.1', 'port': 6000 + i,
+                          'username': f"User_{i}", 'url': f"http://127.0.0.1:{6000 + i}", 'is_active': True}
+            for i in range(nodes)
+        }
+        with open(network_file, 'w', encoding='utf-8') as f:
+            json.dump(registry, f, indent=2)
+        
+        manager = NetworkManager(network_file)
+        
+        start = time.perf_counter()
+        for i in range(lookups):
+            manager.registry.load_network().get(f"node-{i % nodes}")
+        before = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for i in range(lookups):
+            manager.get_node(f"node-{i % nodes}")
+        after = time.perf_counter() - start
+    
+    print(f"  reload every call  {before / lookups * 1e6:>10.1f} us/lookup")
+    print(f"  cached registry    {after / lookups * 1e6:>10.1f} us/lookup   speedup x{before / after:.0f}")
+    print("="*80 + "\n")
+
+
+def bench_registry_writes(nodes=1000):
+    """NetworkManager: register_node từng node (1 lần ghi/node) vs register_many (1 lần ghi)"""
+    import contextlib
+    import io
+    import tempfile
+    from network.network_manager import NetworkManager
+    
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Network registry writes ({nodes} nodes)")
+    print("="*80)
+    
+    entries = [
+        {'node_id': f"node-{i}", 'host': '127.0.0.1', 'port': 6000 + i, 'username': f"User_{i}"}
+        for i in range(nodes)
+    ]
+    
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        manager = NetworkManager(os.path.join(tmp, 'single.txt'))
+        start = time.perf_counter()
+        for entry in entries:
+            manager.register_node(**entry)
+        before = time.perf_counter() - start
+        
+        manager = NetworkManager(os.path.join(tmp, 'batch.txt'))
+        start = time.perf_counter()
+        manager.register_many(entries)
+        after = time.perf_counter() - start
+    
+    print(f"  register_node x{nodes}  {before * 1000:>10.1f} ms")
+    print(f"  register_many        {after * 1000:>10.1f} ms   speedup x{before / after:.0f}")
+    print("="*80 + "\n")
+
+
+def bench_discovery(nodes=100000, rounds=50):
+    """get_random_nodes (peer discovery) trên registry lớn: JSON file vs SQLite"""
+    import json
+    import tempfile
+    from network.network_manager import NetworkManager
+    from network.registry import make_node_info
+    
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Peer discovery sampling ({nodes:,} nodes, {rounds} x get_random_nodes({config.MAX_PEERS}))")
+    print("="*80)
+    
+    entries = [make_node_info(f"node-{i}", '127.0.0.1', 10000 + i, f"User_{i}") for i in range(nodes)]
+    exclude_ids = [f"node-{i}" for i in range(config.MAX_PEERS + 1)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file = os.path.join(tmp, 'network_nodes.txt')
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump({entry['node_id']: entry for entry in entries}, f)
+        
+        db_file = os.path.join(tmp, 'network_nodes.db')
+        sqlite_manager = NetworkManager(db_file, backend='sqlite')
+        sqlite_manager.registry.import_nodes(entries)
+        
+        for label, manager in [('json', NetworkManager(json_file, backend='json')), ('sqlite', sqlite_manager)]:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                manager.get_random_nodes(config.MAX_PEERS, exclude_ids=exclude_ids)
+            elapsed = (time.perf_counter() - start) / rounds
+            print(f"  {label:<8} {elapsed * 1000:>10.3f} ms/call")
+        
+        sqlite_manager.close()
+    
+    print("="*80 + "\n")
+
+
+def bench_persistence(lengths=(100, 1000, 5000), rounds=20):
+    """Lưu chain sau mỗi block mới: ghi lại toàn bộ JSON (cũ) vs BlockStore append-only"""
+    import json
+    import tempfile
+    from core.block_store import BlockStore
+    
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Chain persistence ({rounds} rounds, 1 new block per round)")
+    print("="*80)
+    
+    for length in lengths:
+        blockchain = build_chain(length)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            account_file = os.path.join(tmp, 'account.txt')
+            store = BlockStore(os.path.join(tmp, 'account.chain'))
+            store.sync(blockchain.chain)
+            
+            rewrite = append = 0
+            for i in range(rounds):
+                blockchain.mempool.add(Transaction("System", f"Extra_{i}", 1, timestamp=1800000000.0 + i))
+                blockchain.mine_pending_transactions("Miner")
+                
+                start = time.perf_counter()
+                with open(account_file, 'w', encoding='utf-8') as f:
+                    json.dump({'blockchain': blockchain.to_list()}, f, indent=2, ensure_ascii=False)
+                rewrite += time.perf_counter() - start
+                
+                start = time.perf_counter()
+                store.sync(blockchain.chain)
+                append += time.perf_counter() - start
+        
+        print(f"  length={length:<6} JSON rewrite: {rewrite / rounds * 1000:>9.2f} ms   "
+              f"BlockStore: {append / rounds * 1000:>7.3f} ms   speedup x{rewrite / append:.0f}")
+    
+    print("="*80 + "\n")
+
+
+def bench_codec(length=2000, rounds=5):
+    """Encode/decode chain: JSON (to_dict + json) vs codec nhị phân, throughput và kích thước payload"""
+    import json
+    from core import codec
+    
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Block serialization ({length} blocks, best of {rounds})")
+    print("="*80)
+    
+    blocks = list(build_chain(length).chain)
+    
+    def best(func):
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+        return min(times), result
+    
+    json_encode, json_payload = best(lambda: json.dumps([b.to_dict() for b in blocks]).encode('utf-8'))
+    json_decode, _ = best(lambda: [Block.from_dict(d) for d in json.loads(json_payload)])
+    indent_payload = json.dumps([b.to_dict() for b in blocks], indent=2).encode('utf-8')
+    binary_encode, binary_payload = best(lambda: codec.encode_blocks(blocks))
+    binary_decode, _ = best(lambda: codec.decode_blocks(binary_payload))
+    
+    for label, encode, decode, size in (
+        ('JSON', json_encode, json_decode, len(json_payload)),
+        ('binary', binary_encode, binary_decode, len(binary_payload)),
+    ):
+        print(f"  {label:<7} encode {length / encode:>10,.0f} blocks/s   decode {length / decode:>10,.0f} blocks/s   "
+              f"{size / length:>6.1f} bytes/block")
+    
+    print(f"  (indented JSON: {len(indent_payload) / length:.1f} bytes/block)")
+    print(f"  speedup encode x{json_encode / binary_encode:.1f}   decode x{json_decode / binary_decode:.1f}   "
+          f"size x{len(json_payload) / len(binary_payload):.1f} smaller")
+    print("="*80 + "\n")
+
+
+def bench_chain_stream(length=20000):
+    """GET /chain: jsonify cả chain (cũ) vs stream từng chunk (JSON / NDJSON / nhị phân)"""
+    import tracemalloc
+    from flask import jsonify
+    from core import codec
+    from network.node import Node, NDJSON_CONTENT_TYPE
+    
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Serving /chain ({length:,} blocks)")
+    print("="*80)
+    
+    node = Node(username="BenchStream")
+    previous_hash = node.blockchain.chain[0].hash
+    for i in range(1, length):
+        tx = Transaction("System", f"User_{i % 100}", 1, timestamp=1700000000.0 + i)
+        block = Block(index=i, transactions=[tx], previous_hash=previous_hash,
+                      timestamp=1700000000.0 + i, miner="Miner")
+        previous_hash = block.hash
+        node.blockchain.chain.append(block)
+    client = node.app.test_client()
+    
+    def jsonify_all():
+        with node.app.app_context():
+            body = jsonify({'chain': node.blockchain.to_list(), 'length': length}).get_data()
+        yield body
+    
+    def stream(accept):
+        response = client.get('/chain', headers={'Accept': accept}, buffered=False)
+        return response.iter_encoded()
+    
+    variants = [
+        ('jsonify (old)', jsonify_all),
+        ('stream JSON', lambda: stream('application/json')),
+        ('stream NDJSON', lambda: stream(NDJSON_CONTENT_TYPE)),
+        ('stream binary', lambda: stream(codec.CONTENT_TYPE)),
+    ]
+    
+    for label, serve in variants:
+        tracemalloc.start()
+        start = time.perf_counter()
+        first = None
+        size = 0
+        for chunk in serve():
+            if first is None:
+                first = time.perf_counter() - start
+            size += len(chunk)
+        total = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        
+        print(f"  {label:<14} first byte {first * 1000:>8.2f} ms   total {total * 1000:>8.1f} ms   "
+              f"peak {peak / 1024 / 1024:>7.2f} MB   body {size / 1024 / 1024:>6.2f} MB")
+    
+    print("="*80 + "\n")
+
+
+def bench_chain_load(length=200000):
+    """Load chain từ block store: eager (from_list) vs lazy (from_store, mmap + LRU)"""
+    import tempfile
+    import tracemalloc
+    from core.block_store import BlockStore
+    
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Chain load ({length:,} blocks, load + read tip)")
+    print("="*80)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BlockStore(os.path.join(tmp, 'bench.chain'))
+        previous_hash = "0" * 64
+        batch = []
+        for i in range(length):
+            tx = Transaction("System", f"User_{i % 100}", 1, timestamp=1700000000.0 + i)
+            block = Block(index=i, transactions=[tx], previous_hash=previous_hash,
+                          timestamp=1700000000.0 + i, miner="Miner")
+            previous_hash = block.hash
+            batch.append(block.to_dict())
+            if len(batch) == 10000:
+                store.extend(batch)
+                batch = []
+        store.extend(batch)
+        
+        def eager_rehash():
+            blockchain = Blockchain.from_list(store.iter_blocks(), owner_address="Alice")
+            for block in blockchain.chain:
+                block.calculate_hash()  # Block.__init__ cũ tính lại hash mọi block khi load
+            return blockchain
+        
+        loaders = [
+            ('eager + rehash (old)', eager_rehash),
+            ('eager from_list', lambda: Blockchain.from_list(store.iter_blocks(), owner_address="Alice")),
+            ('lazy from_store', lambda: Blockchain.from_store(store, owner_address="Alice")),
+        ]
+        
+        for label, load in loaders:
+            tracemalloc.start()
+            start = time.perf_counter()
+            blockchain = load()
+            loaded = time.perf_counter() - start
+            blockchain.get_latest_block()
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            
+            print(f"  {label:<22} load {loaded * 1000:>10.1f} ms   memory {memory / 1024 / 1024:>8.1f} MiB")
+            del blockchain
+    
+    print("="*80 + "\n")
+
+
+def bench_memory(nodes=10, length=500):
+    """Bộ nhớ mỗi block khi chain được đồng bộ tới các Sybil node trong cùng process"""
+    import contextlib
+    import gc
+    import io
+    import json
+    import tempfile
+    import tracemalloc
+    from network.network_manager import NetworkManager
+    from attack.sybil_attack import SybilAttackSimulator
+    
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Chain memory across Sybil nodes ({nodes} nodes x {length} blocks)")
+    print("="*80)
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        payload = json.dumps(build_chain(length).to_list())
+    
+    original_share = getattr(config, 'SHARE_BLOCKS', False)
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        simulator = SybilAttackSimulator(NetworkManager(os.path.join(tmp, 'network_nodes.txt')))
+        sybil_nodes = simulator.create_sybil_nodes(nodes)
+    
+    try:
+        for share in (False, True):
+            config.SHARE_BLOCKS = share
+            gc.collect()
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            
+            # Mỗi node tự giải mã JSON nhận được (như qua /chain) rồi thay chain
+            for node in sybil_nodes:
+                node.blockchain.set_chain([Block.from_dict(block) for block in json.loads(payload)])
+            
+            gc.collect()
+            used = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+            
+            label = 'shared blocks' if share else 'per-node copies'
+            print(f"  {label:<16} {used / 1024 / 1024:>8.1f} MiB total   "
+                  f"{used / (len(sybil_nodes) * length):>8.0f} bytes/block/node")
+            
+            for node in sybil_nodes:
+                node.blockchain.set_chain(node.blockchain.chain[:1])
+    finally:
+        config.SHARE_BLOCKS = original_share
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulator.cleanup()
+            for node in sybil_nodes:
+                node.stop()
+    
+    print("="*80 + "\n")
+
+
+BENCHMARKS = {
+    'hashing': bench_hashing,
+    'mining': bench_mining,
+    'throughput': bench_block_throughput,
+    'validation': bench_validation,
+    'peer_client': bench_peer_client,
+    'registry': bench_registry,
+    'registry_writes': bench_registry_writes,
+    'discovery': bench_discovery,
+    'persistence': bench_persistence,
+    'codec': bench_codec,
+    'chain_stream': bench_chain_stream,
+    'chain_load': bench_chain_load,
+    'memory': bench_memory,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            sys.exit(1)
+        BENCHMARKS[name]()
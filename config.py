@@ -6,16 +6,34 @@ Configuration file cho blockchain system
 DIFFICULTY = 4  # Số lượng số 0 đầu hash (độ khó mining)
 MINING_REWARD = 10.0
 INITIAL_BALANCE = 100.0  # Số dư ban đầu cho mỗi user mới
+MINING_WORKERS = 1  # Số process dùng để mining (1 = single-thread, 0 = tất cả CPU cores)
+MAX_BLOCK_TRANSACTIONS = 100  # Số giao dịch tối đa trong một block
+MAX_BLOCK_BYTES = 100000  # Tổng kích thước (bytes JSON) tối đa của giao dịch trong một block
+SHARE_BLOCKS = True  # Dùng chung Block object (đã verify) giữa các node trong cùng process
 GENESIS_DATA = "Genesis Block - Blockchain Sybil Attack Demo"
 
 # Network Settings
 BASE_PORT = 5000
 MAX_PEERS = 8  # Mỗi node kết nối tối đa 8 peers
 NETWORK_DISCOVERY_INTERVAL = 30  # seconds
+BROADCAST_WORKERS = 8  # Số thread tối đa gửi broadcast song song
+BROADCAST_TIMEOUT = 2  # seconds, timeout mỗi request broadcast
+PEER_TIMEOUT = 2  # seconds, timeout mặc định cho request đến peer
+PEER_RETRIES = 1  # Số lần retry khi không kết nối được peer
+PEER_POOL_SIZE = 4  # Số kết nối keep-alive giữ cho mỗi peer
+HEARTBEAT_INTERVAL = 10  # seconds, chu kỳ probe peers của heartbeat thread
+PEER_MAX_FAILURES = 3  # Số lần probe thất bại liên tiếp trước khi heartbeat evict peer
+PEER_PROBE_TIMEOUT = 1  # seconds, timeout mỗi health probe
+SYNC_BATCH_SIZE = 500  # Số block tối đa mỗi lần tải khi đồng bộ chain
+STREAM_CHUNK_BYTES = 65536  # Kích thước chunk khi stream /chain
+BINARY_CODEC = True  # Trao đổi block/transaction dạng nhị phân với peers hỗ trợ (JSON là fallback)
 
 # Account Settings
 ACCOUNTS_DIR = "accounts"
+CHAIN_CACHE_SIZE = 256  # Số block đã giải mã giữ trong LRU khi chain được load lazy từ block store
 NETWORK_FILE = "network_nodes.txt"
+NETWORK_BACKEND = "json"  # Registry backend: "json" (NETWORK_FILE) hoặc "sqlite" (NETWORK_DB_FILE)
+NETWORK_DB_FILE = "network_nodes.db"
 
 # Attack Simulation Settings
 SYBIL_NODES_COUNT = 20  # Số lượng node giả mạo trong Sybil attack
@@ -3,61 +3,190 @@ Block class - Đại diện cho một block trong blockchain
 """
 import hashlib
 import json
+import threading
+import weakref
 from datetime import datetime
+import config
 from .transaction import Transaction
+from .merkle import compute_merkle_root
+from .mining import HeaderHasher, ParallelMiner, resolve_workers
+
+
+def pack_hash(value):
+    """
+    Hash hex (64 ký tự) -> 32 bytes để lưu gọn trong object.
+    Giá trị khác (None, '0' của genesis, chuỗi bất thường) được giữ nguyên.
+    """
+    if isinstance(value, str) and len(value) == 64:
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            pass
+    return value
+
+
+def unpack_hash(value):
+    """32 bytes -> hash hex (định dạng dùng ở API/JSON)"""
+    return value.hex() if isinstance(value, bytes) else value
 
 
 class Block:
-    def __init__(self, index, transaction, previous_hash, timestamp=None, nonce=0, miner=None):
+    # Không có __dict__ mỗi object; hash lưu dạng bytes, chỉ chuyển sang hex khi đọc
+    __slots__ = ('index', 'is_batch', 'transactions', '_merkle_root', '_previous_hash',
+                 'timestamp', 'nonce', 'miner', '_hash', '__weakref__')
+    
+    def __init__(self, index, transaction=None, previous_hash=None, timestamp=None, nonce=0, miner=None,
+                 transactions=None, merkle_root=None, hash=None):
         """
         Khởi tạo block
         
+        Có 2 định dạng:
+        - Block nhiều giao dịch (transactions != None): header commit vào
+          Merkle root, nên chi phí hash không tăng theo số giao dịch
+        - Block 1 giao dịch kiểu cũ (transaction): hash toàn bộ giao dịch,
+          giữ lại để đọc/validate các chain đã lưu trước đây
+        
         Args:
             index (int): Vị trí của block trong chain
-            transaction (Transaction): Giao dịch trong block
+            transaction (Transaction): Giao dịch trong block (định dạng cũ)
             previous_hash (str): Hash của block trước đó
             timestamp (float): Thời gian tạo block
             nonce (int): Số dùng để mining (Proof of Work)
             miner (str): Địa chỉ của miner (nhận mining reward)
+            transactions (list): Danh sách giao dịch (định dạng nhiều giao dịch)
+            merkle_root (str): Merkle root đã biết (None = tự tính từ transactions)
+            hash (str): Hash đã biết, VD khi load từ storage (None = tự tính)
         """
         self.index = index
-        self.transaction = transaction
+        self.is_batch = transactions is not None
+        if self.is_batch:
+            self.transactions = list(transactions)
+        else:
+            self.transactions = [transaction] if transaction else []
+        self.merkle_root = merkle_root or (self.calculate_merkle_root() if self.is_batch else None)
         self.previous_hash = previous_hash
         self.timestamp = timestamp or datetime.now().timestamp()
         self.nonce = nonce
         self.miner = miner  # ✅ NEW: Lưu thông tin miner
-        self.hash = self.calculate_hash()
+        self.hash = hash or self.calculate_hash()
     
-    def calculate_hash(self):
-        """Tính hash của block"""
-        block_string = json.dumps({
+    @property
+    def transaction(self):
+        """Giao dịch đầu tiên trong block (tương thích với định dạng 1 giao dịch)"""
+        return self.transactions[0] if self.transactions else None
+    
+    @property
+    def hash(self):
+        """Hash hex của block"""
+        return unpack_hash(self._hash)
+    
+    @hash.setter
+    def hash(self, value):
+        self._hash = pack_hash(value)
+    
+    @property
+    def hash_bytes(self):
+        """Hash dạng lưu trữ nội bộ (32 bytes), dùng làm key khi share block"""
+        return self._hash
+    
+    @property
+    def previous_hash(self):
+        """Hash hex của block trước"""
+        return unpack_hash(self._previous_hash)
+    
+    @previous_hash.setter
+    def previous_hash(self, value):
+        self._previous_hash = pack_hash(value)
+    
+    @property
+    def merkle_root(self):
+        """Merkle root hex (None với block định dạng cũ)"""
+        return unpack_hash(self._merkle_root)
+    
+    @merkle_root.setter
+    def merkle_root(self, value):
+        self._merkle_root = pack_hash(value)
+    
+    def calculate_merkle_root(self):
+        """Tính Merkle root từ các giao dịch hiện có trong block"""
+        return compute_merkle_root([tx.calculate_hash() for tx in self.transactions])
+    
+    def has_valid_merkle_root(self):
+        """Kiểm tra Merkle root trong header khớp với danh sách giao dịch"""
+        return not self.is_batch or self.merkle_root == self.calculate_merkle_root()
+    
+    def header_dict(self):
+        """Dữ liệu được hash của block"""
+        if self.is_batch:
+            return {
+                'index': self.index,
+                'merkle_root': self.merkle_root,
+                'tx_count': len(self.transactions),
+                'previous_hash': self.previous_hash,
+                'timestamp': self.timestamp,
+                'nonce': self.nonce,
+                'miner': self.miner
+            }
+        
+        return {
             'index': self.index,
             'transaction': self.transaction.to_dict() if self.transaction else None,
             'previous_hash': self.previous_hash,
             'timestamp': self.timestamp,
             'nonce': self.nonce,
             'miner': self.miner  # ✅ Include miner in hash
-        }, sort_keys=True)
+        }
+    
+    def calculate_hash(self):
+        """Tính hash của block"""
+        block_string = json.dumps(self.header_dict(), sort_keys=True)
         
         return hashlib.sha256(block_string.encode()).hexdigest()
     
-    def mine_block(self, difficulty):
+    def mine_block(self, difficulty, workers=None, cancel_event=None):
         """
         Mine block với Proof of Work
         
         Args:
             difficulty (int): Độ khó (số lượng số 0 đầu hash)
+            workers (int): Số process mining (None = config.MINING_WORKERS, 0 = tất cả CPU cores)
+            cancel_event (threading.Event): Set event này để dừng mining (VD: nhận block mới từ peer)
+        
+        Returns:
+            bool: True nếu mine thành công, False nếu bị cancel
         """
-        target = '0' * difficulty
+        if resolve_workers(workers) > 1:
+            if not ParallelMiner(workers).mine(self, difficulty, cancel_event):
+                print(f"Mining cancelled at nonce {self.nonce}")
+                return False
+            print(f"Block mined: {self.hash}")
+            return True
+        
+        # Fast path: chỉ serialize phần header cố định một lần
+        found = HeaderHasher(self.header_dict()).search(difficulty, self.nonce, stop_event=cancel_event)
         
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        if found is None:
+            print(f"Mining cancelled at nonce {self.nonce}")
+            return False
         
+        self.nonce, self.hash = found
         print(f"Block mined: {self.hash}")
+        return True
     
     def to_dict(self):
         """Chuyển block thành dictionary"""
+        if self.is_batch:
+            return {
+                'index': self.index,
+                'transactions': [tx.to_dict() for tx in self.transactions],
+                'merkle_root': self.merkle_root,
+                'previous_hash': self.previous_hash,
+                'timestamp': self.timestamp,
+                'nonce': self.nonce,
+                'hash': self.hash,
+                'miner': self.miner
+            }
+        
         return {
             'index': self.index,
             'transaction': self.transaction.to_dict() if self.transaction else None,
@@ -70,25 +199,77 @@ class Block:
     
     @staticmethod
     def from_dict(data):
-        """Tạo Block từ dictionary"""
+        """Tạo Block từ dictionary (hỗ trợ cả định dạng cũ 1 giao dịch)"""
+        if 'transactions' in data:
+            return Block(
+                index=data['index'],
+                transactions=[Transaction.from_dict(tx) for tx in data['transactions']],
+                merkle_root=data.get('merkle_root'),
+                previous_hash=data['previous_hash'],
+                timestamp=data['timestamp'],
+                nonce=data['nonce'],
+                miner=data.get('miner'),
+                hash=data['hash']
+            )
+        
         transaction = None
         if data.get('transaction'):
             transaction = Transaction.from_dict(data['transaction'])
         
-        block = Block(
+        return Block(
             index=data['index'],
             transaction=transaction,
             previous_hash=data['previous_hash'],
             timestamp=data['timestamp'],
             nonce=data['nonce'],
-            miner=data.get('miner')  # ✅ Load miner
+            miner=data.get('miner'),  # ✅ Load miner
+            hash=data['hash']  # Hash đã lưu -> không cần tính lại
         )
-        block.hash = data['hash']
-        return block
     
     def __str__(self):
-        tx_str = str(self.transaction) if self.transaction else "No transaction"
+        if len(self.transactions) > 1:
+            tx_str = f"{len(self.transactions)} transactions"
+        else:
+            tx_str = str(self.transaction) if self.transaction else "No transaction"
         return f"Block #{self.index} [{self.hash[:10]}...] - {tx_str}"
     
     def __repr__(self):
         return f"Block(index={self.index}, hash={self.hash[:10]}...)"
+
+
+# Block đã verify, dùng chung giữa các Blockchain/Node trong cùng process (key: hash bytes)
+_shared_blocks = weakref.WeakValueDictionary()
+_shared_lock = threading.Lock()
+
+
+def share_block(block):
+    """
+    Trả về bản Block dùng chung cho các chain trong cùng process.
+    
+    Nhiều node mô phỏng trong một process nhận cùng một block qua HTTP,
+    mỗi node tự giải mã ra một bản sao. Block trong chain là bất biến, nên
+    bản đầu tiên đã verify (hash và Merkle root khớp nội dung) được dùng
+    chung, các bản sau cùng hash được thay bằng nó. Block không verify được
+    (VD: chain giả mạo trong demo Eclipse) giữ nguyên, không được share.
+    
+    Args:
+        block (Block): Block sắp được thêm vào chain
+    
+    Returns:
+        Block: Block dùng chung (hoặc chính `block`)
+    """
+    if not config.SHARE_BLOCKS:
+        return block
+    
+    key = block.hash_bytes
+    with _shared_lock:
+        existing = _shared_blocks.get(key)
+    if existing is block:
+        return block
+    
+    if not block.has_valid_merkle_root() or block.hash != block.calculate_hash():
+        return block
+    
+    with _shared_lock:
+        existing = _shared_blocks.setdefault(key, block)
+    return existing
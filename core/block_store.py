@@ -0,0 +1,226 @@
+"""
+Block Store - Lưu blockchain dạng append-only (segment file + offset index)
+"""
+import json
+import os
+import struct
+
+
+class BlockStore:
+    # Mỗi record trong segment: [độ dài payload (uint32 big-endian)][payload JSON]
+    RECORD_HEADER = struct.Struct('>I')
+    
+    # Mỗi entry trong index: [offset record trong segment (uint64)][hash block (64 ký tự hex)]
+    INDEX_ENTRY = struct.Struct('>Q64s')
+    
+    def __init__(self, path):
+        """
+        Khởi tạo Block Store.
+        
+        Block được ghi nối tiếp vào `<path>` (segment), index `<path>.idx`
+        giữ offset + hash của từng block nên thêm block là O(1), đọc block
+        thứ i chỉ cần một lần seek, và tìm điểm fork không cần decode block.
+        
+        Args:
+            path (str): Đường dẫn segment file (VD: accounts/alice.chain)
+        """
+        self.path = path
+        self.index_path = path + '.idx'
+        self._recover()
+    
+    def _recover(self):
+        """
+        Cắt bỏ phần ghi dở (VD: process bị kill giữa lúc append).
+        
+        Segment luôn được ghi trước index, nên chỉ cần bỏ các entry index
+        trỏ ra ngoài segment và phần đuôi segment không có entry nào trỏ tới.
+        """
+        # Thiếu một trong hai file thì file còn lại cũng không dùng được -> tạo mới cả hai
+        if not os.path.exists(self.path) or not os.path.exists(self.index_path):
+            for path in (self.path, self.index_path):
+                open(path, 'wb').close()
+            return
+        
+        entry_size = self.INDEX_ENTRY.size
+        length = os.path.getsize(self.index_path) // entry_size
+        segment_size = os.path.getsize(self.path)
+        
+        with open(self.path, 'rb') as segment, open(self.index_path, 'rb') as index:
+            while length > 0:
+                index.seek((length - 1) * entry_size)
+                offset, _ = self.INDEX_ENTRY.unpack(index.read(entry_size))
+                segment.seek(offset)
+                header = segment.read(self.RECORD_HEADER.size)
+                
+                if len(header) == self.RECORD_HEADER.size:
+                    end = offset + self.RECORD_HEADER.size + self.RECORD_HEADER.unpack(header)[0]
+                    if end <= segment_size:
+                        break
+                length -= 1
+            else:
+                end = 0
+        
+        os.truncate(self.index_path, length * entry_size)
+        os.truncate(self.path, end)
+    
+    def __len__(self):
+        """Số block đang lưu (O(1), suy ra từ kích thước index)"""
+        return os.path.getsize(self.index_path) // self.INDEX_ENTRY.size
+    
+    def _read_entry(self, height):
+        """Đọc (offset, hash) của block tại vị trí `height`"""
+        with open(self.index_path, 'rb') as index:
+            index.seek(height * self.INDEX_ENTRY.size)
+            offset, block_hash = self.INDEX_ENTRY.unpack(index.read(self.INDEX_ENTRY.size))
+        return offset, block_hash.rstrip(b'\x00').decode('ascii')
+    
+    def get_hash(self, height):
+        """Hash của block tại vị trí `height` (không cần đọc segment)"""
+        return self._read_entry(height)[1]
+    
+    def read(self, height):
+        """
+        Đọc một block
+        
+        Args:
+            height (int): Vị trí block (0 = genesis)
+        
+        Returns:
+            dict: Block dưới dạng dict (Block.to_dict())
+        """
+        if not 0 <= height < len(self):
+            raise IndexError(f"Block {height} not in store (length {len(self)})")
+        
+        offset, _ = self._read_entry(height)
+        with open(self.path, 'rb') as segment:
+            segment.seek(offset)
+            size, = self.RECORD_HEADER.unpack(segment.read(self.RECORD_HEADER.size))
+            return json.loads(segment.read(size))
+    
+    def iter_blocks(self, start=0):
+        """
+        Đọc tuần tự các block từ vị trí `start` (từng block một, không load cả file)
+        
+        Yields:
+            dict: Block dưới dạng dict
+        """
+        length = len(self)
+        if start >= length:
+            return
+        
+        offset, _ = self._read_entry(start)
+        with open(self.path, 'rb') as segment:
+            segment.seek(offset)
+            for _ in range(start, length):
+                size, = self.RECORD_HEADER.unpack(segment.read(self.RECORD_HEADER.size))
+                yield json.loads(segment.read(size))
+    
+    def read_all(self):
+        """Đọc toàn bộ blocks (list of dicts, dùng cho Blockchain.from_list)"""
+        return list(self.iter_blocks())
+    
+    def extend(self, block_dicts):
+        """
+        Ghi nối tiếp các block vào cuối store
+        
+        Args:
+            block_dicts (iterable): Các block dưới dạng dict
+        
+        Returns:
+            int: Số block đã ghi
+        """
+        records = []
+        entries = []
+        
+        with open(self.path, 'ab') as segment:
+            offset = segment.tell()
+            
+            for block_dict in block_dicts:
+                payload = json.dumps(block_dict, separators=(',', ':')).encode('utf-8')
+                records.append(self.RECORD_HEADER.pack(len(payload)))
+                records.append(payload)
+                entries.append(self.INDEX_ENTRY.pack(offset, block_dict['hash'].encode('ascii')))
+                offset += self.RECORD_HEADER.size + len(payload)
+            
+            if not entries:
+                return 0
+            
+            # Segment ghi xong (và flush) trước, index sau -> _recover xử lý được crash giữa chừng
+            segment.write(b''.join(records))
+            segment.flush()
+        
+        with open(self.index_path, 'ab') as index:
+            index.write(b''.join(entries))
+        
+        return len(entries)
+    
+    def append(self, block_dict):
+        """Ghi một block vào cuối store (O(1))"""
+        self.extend([block_dict])
+    
+    def truncate(self, height):
+        """
+        Xóa các block từ vị trí `height` trở đi (VD: khi chain bị thay bởi fork khác)
+        
+        Args:
+            height (int): Số block giữ lại
+        """
+        if height >= len(self):
+            return
+        
+        offset = self._read_entry(height)[0] if height > 0 else 0
+        os.truncate(self.index_path, height * self.INDEX_ENTRY.size)
+        os.truncate(self.path, offset)
+    
+    @staticmethod
+    def _block_hash(block):
+        """Hash của Block hoặc block dạng dict"""
+        return block['hash'] if isinstance(block, dict) else block.hash
+    
+    def common_length(self, blocks):
+        """
+        Số block đầu chung giữa store và chain `blocks`.
+        
+        Hash của block cam kết previous_hash, nên chỉ cần dò ngược từ vị trí
+        cuối chung tới block đầu tiên trùng hash; trường hợp thường gặp (chain
+        chỉ dài thêm) chỉ tốn một lần đọc index.
+        
+        Args:
+            blocks (list): Các Block (hoặc dict) của chain, theo thứ tự
+        
+        Returns:
+            int: Độ dài prefix chung
+        """
+        # ChainView đọc được hash thẳng từ index, không cần giải mã block
+        block_hash = getattr(blocks, 'get_hash', None) or (lambda height: self._block_hash(blocks[height]))
+        
+        height = min(len(self), len(blocks))
+        while height > 0 and self.get_hash(height - 1) != block_hash(height - 1):
+            height -= 1
+        return height
+    
+    def sync(self, blocks):
+        """
+        Đồng bộ store với chain: cắt phần fork khác và chỉ ghi các block mới
+        
+        Args:
+            blocks (list): Các Block (hoặc dict) của chain hiện tại
+        
+        Returns:
+            tuple: (số block bị cắt, số block ghi thêm)
+        """
+        common = self.common_length(blocks)
+        removed = len(self) - common
+        
+        self.truncate(common)
+        added = self.extend(
+            block if isinstance(block, dict) else block.to_dict()
+            for block in blocks[common:]
+        )
+        return removed, added
+    
+    def delete(self):
+        """Xóa segment và index"""
+        for path in (self.path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
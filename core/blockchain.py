@@ -2,8 +2,11 @@
 Blockchain class - Quản lý chuỗi các blocks
 """
 import json
-from .block import Block
+import threading
+from .block import Block, share_block
 from .transaction import Transaction
+from .mempool import Mempool
+from .chain_view import ChainView, iter_blocks, block_hash_at
 from datetime import datetime
 import config
 
@@ -16,14 +19,21 @@ class Blockchain:
         Args:
             owner_address (str): Địa chỉ của owner (nhận initial balance)
         """
+        self._init_state(owner_address)
+        
+        # Tạo genesis block
+        self.create_genesis_block()
+    
+    def _init_state(self, owner_address):
+        """Khởi tạo các thuộc tính của blockchain (chưa có block nào)"""
         self.chain = []
-        self.pending_transactions = []
+        self.mempool = Mempool()
         self.difficulty = config.DIFFICULTY
         self.mining_reward = config.MINING_REWARD
         self.owner_address = owner_address
-        
-        # Tạo genesis block
-        self.create_genesis_block()
+        self.mining_cancel = threading.Event()
+        self.reset_balance_index()
+        self.reset_validation()
     
     def create_genesis_block(self):
         """Tạo block đầu tiên trong blockchain với initial balance cho owner"""
@@ -46,19 +56,161 @@ class Blockchain:
         
         genesis_block = Block(
             index=0,
-            transaction=genesis_transaction,
+            transactions=[genesis_transaction],
             previous_hash="0",
             timestamp=datetime.now().timestamp()
         )
         
         genesis_block.mine_block(self.difficulty)
-        self.chain.append(genesis_block)
+        self.append_block(genesis_block)
         
         if self.owner_address:
             print(f"Genesis block created! {self.owner_address} received {config.INITIAL_BALANCE} coins")
         else:
             print("Genesis block created!")
     
+    @property
+    def pending_transactions(self):
+        """Pool giao dịch pending (Mempool - hỗ trợ len/iter/append như list)"""
+        return self.mempool
+    
+    @pending_transactions.setter
+    def pending_transactions(self, transactions):
+        # Cho phép gán trực tiếp (VD: blockchain.pending_transactions = [])
+        self.mempool = Mempool(transactions)
+    
+    def append_block(self, block):
+        """
+        Thêm block (đã validate) vào cuối chain và cập nhật balance index
+        
+        Args:
+            block (Block): Block cần thêm
+        """
+        block = share_block(block)
+        self.sync_balance_index()
+        self.chain.append(block)
+        self._apply_block_balances(block)
+        
+        # Giao dịch đã vào block thì không còn pending
+        for transaction in block.transactions:
+            self.mempool.discard(transaction)
+        self._indexed_height = len(self.chain)
+        self._indexed_tip = block
+    
+    def set_chain(self, new_chain):
+        """
+        Thay chain hiện tại bằng danh sách blocks mới (đã validate).
+        
+        Balance index được rollback về điểm rẽ nhánh (block chung cuối cùng)
+        rồi áp dụng các block mới, thay vì tính lại từ đầu.
+        
+        Args:
+            new_chain (list): Danh sách Block
+        """
+        common_length = 0
+        limit = min(len(self.chain), len(new_chain))
+        while common_length < limit and block_hash_at(self.chain, common_length) == new_chain[common_length].hash:
+            common_length += 1
+        
+        self.replace_suffix(common_length, new_chain[common_length:])
+    
+    def replace_suffix(self, common_length, blocks):
+        """
+        Giữ `common_length` block đầu, thay phần còn lại bằng `blocks` (đã validate).
+        
+        Chi phí tỉ lệ với số block bị thay/thêm, không phải độ dài chain.
+        
+        Args:
+            common_length (int): Số block đầu chain được giữ nguyên
+            blocks (list): Các Block mới nối sau phần chung
+        """
+        blocks = [share_block(block) for block in blocks]
+        self.sync_balance_index()
+        
+        for block in reversed(self.chain[common_length:]):
+            self._apply_block_balances(block, sign=-1)
+        for block in blocks:
+            self._apply_block_balances(block)
+        
+        del self.chain[common_length:]
+        self.chain.extend(blocks)
+        self._indexed_height = len(self.chain)
+        self._indexed_tip = self.chain[-1] if self.chain else None
+        
+        # Phần chung vẫn hợp lệ - chỉ lùi validated high-water mark về điểm rẽ nhánh
+        if self._validated_height > common_length:
+            self._validated_height = common_length
+            self._validated_tip = self.chain[common_length - 1] if common_length else None
+    
+    def get_locator(self):
+        """
+        Tạo block locator: các (height, hash) dày ở đầu chain, thưa dần về genesis
+        
+        Returns:
+            list: [{'height': int, 'hash': str}, ...] theo thứ tự height giảm dần
+        """
+        locator = []
+        height = len(self.chain) - 1
+        step = 1
+        
+        while height > 0:
+            locator.append({'height': height, 'hash': block_hash_at(self.chain, height)})
+            if len(locator) >= 10:
+                step *= 2
+            height -= step
+        
+        if self.chain:
+            locator.append({'height': 0, 'hash': block_hash_at(self.chain, 0)})
+        
+        return locator
+    
+    def find_fork_height(self, locator):
+        """
+        Tìm block chung cao nhất giữa chain này và locator của peer
+        
+        Args:
+            locator (list): Block locator của peer (xem get_locator)
+        
+        Returns:
+            int: Height của block chung cao nhất (-1 nếu không có block chung)
+        """
+        for entry in locator:
+            height = entry['height']
+            if 0 <= height < len(self.chain) and block_hash_at(self.chain, height) == entry['hash']:
+                return height
+        return -1
+    
+    def extend_from(self, fork_height, blocks):
+        """
+        Nối các block tải từ peer sau block chung `fork_height` (chỉ validate block mới)
+        
+        Args:
+            fork_height (int): Height của block chung cao nhất (-1 = không có)
+            blocks (list): Các Block từ fork_height + 1 trở đi
+        
+        Returns:
+            bool: True nếu chain được thay thế
+        """
+        common_length = fork_height + 1
+        
+        if common_length + len(blocks) <= len(self.chain):
+            return False
+        
+        previous_block = self.chain[fork_height] if fork_height >= 0 else None
+        if not self.validate_blocks(blocks, previous_block):
+            print("Received blocks are invalid!")
+            return False
+        
+        prefix_validated = self._validated_height >= common_length
+        self.replace_suffix(common_length, blocks)
+        
+        if prefix_validated:
+            self._validated_height = len(self.chain)
+            self._validated_tip = self.chain[-1]
+            self._validated_difficulty = self.difficulty
+        
+        return True
+    
     def get_latest_block(self):
         """Lấy block cuối cùng trong chain"""
         return self.chain[-1] if self.chain else None
@@ -75,8 +227,12 @@ class Blockchain:
         """
         # Skip validation cho System transactions (genesis, mining reward)
         if transaction.sender == "System" or transaction.sender == "Genesis":
-            self.pending_transactions.append(transaction)
-            print(f"System transaction added to pool: {transaction}")
+            if self.mempool.add(transaction):
+                print(f"System transaction added to pool: {transaction}")
+            return
+        
+        if transaction in self.mempool:
+            print(f"Transaction already in pool: {transaction}")
             return
         
         # Validate sender balance (confirmed + pending để tránh double-spending)
@@ -91,70 +247,144 @@ class Blockchain:
                 f"Required: {transaction.amount}"
             )
         
-        self.pending_transactions.append(transaction)
+        self.mempool.add(transaction)
         print(f"Transaction added to pool: {transaction}")
     
-    def mine_pending_transactions(self, miner_address):
+    def mine_pending_transactions(self, miner_address, workers=None):
         """
         Mine tất cả giao dịch pending
         
         Args:
             miner_address (str): Địa chỉ của miner
+            workers (int): Số process mining (None = config.MINING_WORKERS, 0 = tất cả CPU cores)
         
         Returns:
-            Block: Block mới được mine (hoặc None nếu không có transaction)
+            Block: Block mới được mine (hoặc None nếu không có transaction / bị cancel)
         """
-        if not self.pending_transactions:
+        if not self.mempool:
             print("No transactions to mine!")
             return None
         
-        # Lấy transaction đầu tiên (mỗi block chỉ chứa 1 transaction)
-        transaction = self.pending_transactions.pop(0)
+        # Lấy một batch giao dịch từ đầu mempool (giới hạn số lượng / kích thước)
+        transactions = self.mempool.take(config.MAX_BLOCK_TRANSACTIONS, config.MAX_BLOCK_BYTES)
         
         # Tạo block mới với miner address
         new_block = Block(
             index=len(self.chain),
-            transaction=transaction,
+            transactions=transactions,
             previous_hash=self.get_latest_block().hash,
             miner=miner_address  # ✅ Set miner để nhận reward
         )
         
-        print(f"Mining block {new_block.index}...")
-        new_block.mine_block(self.difficulty)
+        print(f"Mining block {new_block.index} ({len(transactions)} transactions)...")
+        self.mining_cancel.clear()
+        if not new_block.mine_block(self.difficulty, workers=workers, cancel_event=self.mining_cancel):
+            # Bị cancel (VD: peer đã mine block mới) - trả các giao dịch về đầu pool
+            for transaction in reversed(transactions):
+                self.mempool.add_first(transaction)
+            return None
         
         # Thêm block vào chain
-        self.chain.append(new_block)
+        self.append_block(new_block)
         
         print(f"Block {new_block.index} mined successfully!")
         print(f"💰 Miner {miner_address} will receive {self.mining_reward} coins reward")
         return new_block
     
-    def is_chain_valid(self):
+    def cancel_mining(self):
+        """Dừng quá trình mining đang chạy (VD: khi nhận block mới từ peer)"""
+        self.mining_cancel.set()
+    
+    def check_block(self, block, previous_block):
         """
-        Kiểm tra tính hợp lệ của blockchain
+        Kiểm tra một block so với block trước nó
+        
+        Args:
+            block (Block): Block cần kiểm tra
+            previous_block (Block): Block liền trước
         
         Returns:
-            bool: True nếu chain hợp lệ, False nếu không
+            str: Mô tả lỗi (hoặc None nếu hợp lệ)
         """
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i - 1]
-            
-            # Kiểm tra hash của block hiện tại
-            if current_block.hash != current_block.calculate_hash():
-                print(f"Block {i} has invalid hash!")
-                return False
+        # Kiểm tra hash của block hiện tại
+        if block.hash != block.calculate_hash():
+            return "has invalid hash!"
+        
+        # Kiểm tra Merkle root khớp với các giao dịch
+        if not block.has_valid_merkle_root():
+            return "has invalid merkle root!"
+        
+        # Kiểm tra liên kết với block trước
+        if block.previous_hash != previous_block.hash:
+            return "has invalid previous_hash!"
+        
+        # Kiểm tra Proof of Work
+        if not block.hash.startswith('0' * self.difficulty):
+            return "doesn't meet difficulty requirement!"
+        
+        return None
+    
+    def validate_blocks(self, blocks, previous_block=None):
+        """
+        Validate một dãy block liên tiếp
+        
+        Args:
+            blocks (list): Các Block liên tiếp
+            previous_block (Block): Block đứng trước blocks[0] (None = blocks[0] là genesis)
+        
+        Returns:
+            bool: True nếu tất cả hợp lệ
+        """
+        for i, block in enumerate(blocks):
+            previous = blocks[i - 1] if i else previous_block
+            if previous is None:
+                continue
             
-            # Kiểm tra liên kết với block trước
-            if current_block.previous_hash != previous_block.hash:
-                print(f"Block {i} has invalid previous_hash!")
+            error = self.check_block(block, previous)
+            if error:
+                print(f"Block {block.index} {error}")
                 return False
-            
-            # Kiểm tra Proof of Work
-            if not current_block.hash.startswith('0' * self.difficulty):
-                print(f"Block {i} doesn't meet difficulty requirement!")
+        
+        return True
+    
+    def reset_validation(self):
+        """Xóa validated high-water mark (lần validate sau sẽ kiểm tra toàn bộ chain)"""
+        self._validated_height = 0
+        self._validated_tip = None
+        self._validated_difficulty = None
+    
+    def is_chain_valid(self, full=False):
+        """
+        Kiểm tra tính hợp lệ của blockchain
+        
+        Blockchain ghi nhớ validated high-water mark (số block đầu chain đã
+        được kiểm tra là hợp lệ). Nếu phần đầu chain không đổi, lần validate
+        sau chỉ kiểm tra các block mới được thêm vào.
+        
+        Args:
+            full (bool): True = bỏ qua cache, validate lại toàn bộ chain
+        
+        Returns:
+            bool: True nếu chain hợp lệ, False nếu không
+        """
+        start = 1
+        height = self._validated_height
+        
+        if (not full and height and len(self.chain) >= height
+                and self.chain[height - 1] is self._validated_tip
+                and self._validated_difficulty == self.difficulty):
+            start = max(start, height)
+        
+        for i in range(start, len(self.chain)):
+            error = self.check_block(self.chain[i], self.chain[i - 1])
+            if error:
+                print(f"Block {i} {error}")
                 return False
         
+        # Ghi nhớ high-water mark cho lần validate sau
+        self._validated_height = len(self.chain)
+        self._validated_tip = self.chain[-1] if self.chain else None
+        self._validated_difficulty = self.difficulty
         return True
     
     def replace_chain(self, new_chain):
@@ -170,21 +400,83 @@ class Blockchain:
         if len(new_chain) <= len(self.chain):
             return False
         
-        # Tạo blockchain tạm để validate
-        temp_blockchain = Blockchain()
-        temp_blockchain.chain = [Block.from_dict(block) for block in new_chain]
+        # Validate trực tiếp danh sách blocks (không cần blockchain tạm)
+        blocks = [Block.from_dict(block) for block in new_chain]
         
-        if not temp_blockchain.is_chain_valid():
+        if not self.validate_blocks(blocks):
             print("Received chain is invalid!")
             return False
         
         print("Replacing chain with longer valid chain...")
-        self.chain = temp_blockchain.chain
+        self.set_chain(blocks)
         return True
     
+    def reset_balance_index(self):
+        """Xóa balance index (sẽ được build lại ở lần truy vấn tiếp theo)"""
+        self.balances = {}
+        self._indexed_height = 0
+        self._indexed_tip = None
+    
+    def _apply_block_balances(self, block, sign=1):
+        """
+        Áp dụng (sign=1) hoặc hoàn tác (sign=-1) ảnh hưởng của block lên balance index
+        
+        Args:
+            block (Block): Block cần áp dụng
+            sign (int): 1 = áp dụng, -1 = rollback
+        """
+        # ✅ Mining reward
+        if block.miner is not None:
+            self.balances[block.miner] = self.balances.get(block.miner, 0) + sign * self.mining_reward
+        
+        for tx in block.transactions:
+            self.balances[tx.sender] = self.balances.get(tx.sender, 0) - sign * tx.amount
+            self.balances[tx.receiver] = self.balances.get(tx.receiver, 0) + sign * tx.amount
+    
+    def sync_balance_index(self):
+        """
+        Đồng bộ balance index với self.chain.
+        
+        Nếu chain chỉ được append thêm (block tại height đã index vẫn giữ nguyên),
+        chỉ áp dụng các block mới; nếu chain bị thay thế/cắt ngắn từ bên ngoài
+        (VD: gán trực tiếp blockchain.chain = [...]) thì build lại toàn bộ.
+        """
+        height = self._indexed_height
+        
+        if height and (len(self.chain) < height or self.chain[height - 1] is not self._indexed_tip):
+            self.reset_balance_index()
+            height = 0
+        
+        if height == len(self.chain):
+            return
+        
+        for block in iter_blocks(self.chain, height):
+            self._apply_block_balances(block)
+        
+        self._indexed_height = len(self.chain)
+        self._indexed_tip = self.chain[-1]
+    
     def get_balance(self, address):
         """
-        Tính số dư của một địa chỉ (CHỈ từ confirmed transactions trong chain)
+        Lấy số dư của một địa chỉ (CHỈ từ confirmed transactions trong chain)
+        
+        Tra cứu O(1) từ balance index (được cập nhật tăng dần khi chain thay đổi).
+        
+        Args:
+            address (str): Địa chỉ cần kiểm tra
+        
+        Returns:
+            float: Số dư confirmed
+        """
+        self.sync_balance_index()
+        
+        # KHÔNG tính pending transactions (chưa confirmed)
+        # Pending transactions chỉ được tính sau khi mine thành công
+        return self.balances.get(address, 0)
+    
+    def scan_balance(self, address):
+        """
+        Tính số dư bằng cách duyệt toàn bộ chain (dùng để kiểm tra balance index)
         
         Args:
             address (str): Địa chỉ cần kiểm tra
@@ -200,21 +492,18 @@ class Blockchain:
             if block.miner == address:
                 balance += self.mining_reward
             
-            # Check transaction
-            if block.transaction:
-                if block.transaction.sender == address:
-                    balance -= block.transaction.amount
-                if block.transaction.receiver == address:
-                    balance += block.transaction.amount
-        
-        # KHÔNG tính pending transactions (chưa confirmed)
-        # Pending transactions chỉ được tính sau khi mine thành công
+            # Check transactions
+            for tx in block.transactions:
+                if tx.sender == address:
+                    balance -= tx.amount
+                if tx.receiver == address:
+                    balance += tx.amount
         
         return balance
     
     def get_pending_balance(self, address):
         """
-        Tính số dư pending (chưa confirmed) của một địa chỉ
+        Tính số dư pending (chưa confirmed) của một địa chỉ (O(1) từ mempool)
         
         Args:
             address (str): Địa chỉ cần kiểm tra
@@ -222,15 +511,7 @@ class Blockchain:
         Returns:
             float: Số dư pending
         """
-        pending_balance = 0
-        
-        for tx in self.pending_transactions:
-            if tx.sender == address:
-                pending_balance -= tx.amount
-            if tx.receiver == address:
-                pending_balance += tx.amount
-        
-        return pending_balance
+        return self.mempool.pending_balance(address)
     
     def get_total_balance(self, address):
         """
@@ -271,11 +552,7 @@ class Blockchain:
         """
         # Tạo blockchain mới nhưng không tạo genesis block
         blockchain = Blockchain.__new__(Blockchain)
-        blockchain.chain = []
-        blockchain.pending_transactions = []
-        blockchain.difficulty = config.DIFFICULTY
-        blockchain.mining_reward = config.MINING_REWARD
-        blockchain.owner_address = owner_address
+        blockchain._init_state(owner_address)
         
         # Load các blocks từ data
         for block_data in chain_data:
@@ -284,6 +561,24 @@ class Blockchain:
         
         return blockchain
     
+    @staticmethod
+    def from_store(store, owner_address=None):
+        """
+        Tạo Blockchain đọc lazy từ block store: không giải mã block nào lúc load,
+        Block chỉ được tạo khi truy cập (ChainView + LRU)
+        
+        Args:
+            store (BlockStore): Block store chứa chain
+            owner_address (str): Địa chỉ owner (optional)
+        
+        Returns:
+            Blockchain: Blockchain object
+        """
+        blockchain = Blockchain.__new__(Blockchain)
+        blockchain._init_state(owner_address)
+        blockchain.chain = ChainView(store)
+        return blockchain
+    
     def display_chain(self):
         """Hiển thị toàn bộ blockchain"""
         print("\n" + "="*80)
@@ -298,8 +593,10 @@ class Blockchain:
             print(f"  Nonce: {block.nonce}")
             if block.miner:
                 print(f"  ⛏️  Miner: {block.miner} (+{self.mining_reward} coins)")
-            if block.transaction:
-                print(f"  Transaction: {block.transaction}")
+            if block.merkle_root:
+                print(f"  Merkle Root: {block.merkle_root}")
+            for tx in block.transactions:
+                print(f"  Transaction: {tx}")
         
         print("\n" + "="*80)
         print(f"Chain is valid: {self.is_chain_valid()}")
@@ -0,0 +1,228 @@
+"""
+Chain View - Chain đọc lazy từ block store (mmap), chỉ tạo Block khi được truy cập
+"""
+import json
+import mmap
+from collections import OrderedDict
+from collections.abc import MutableSequence
+import config
+from .block import Block
+from .block_store import BlockStore
+
+
+class ChainView(MutableSequence):
+    def __init__(self, store, cache_size=None):
+        """
+        Khởi tạo Chain View.
+        
+        Các block đã có trong store (phần "base") được đọc qua mmap và chỉ
+        chuyển thành Block khi truy cập, với một LRU nhỏ cho các block hay
+        dùng; block tip của base được giữ cố định để các kiểm tra identity
+        (balance index, validated mark) không bị mất khi LRU evict. Block
+        thêm sau khi load nằm trong list `_tail` như một list thường.
+        
+        Store chỉ bị cắt tại điểm fork với chain hiện tại, mà phần base bị
+        thay đổi thì đã được chuyển sang `_tail` trước, nên vùng mmap không
+        bao giờ bị cắt khi view còn đọc.
+        
+        Args:
+            store (BlockStore): Block store chứa chain
+            cache_size (int): Số block giữ trong LRU (None = config.CHAIN_CACHE_SIZE)
+        """
+        self.store = store
+        self.cache_size = cache_size or config.CHAIN_CACHE_SIZE
+        self._base_length = len(store)
+        self._tail = []
+        self._cache = OrderedDict()
+        self._pinned = None  # (height, Block) của tip phần base
+        
+        self._segment = None
+        self._index = None
+        if self._base_length:
+            with open(store.path, 'rb') as f:
+                self._segment = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with open(store.index_path, 'rb') as f:
+                self._index = mmap.mmap(f.fileno(), self._base_length * BlockStore.INDEX_ENTRY.size,
+                                        access=mmap.ACCESS_READ)
+    
+    def _read_dict(self, height):
+        """Giải mã block tại `height` (phần base) từ mmap"""
+        offset, _ = BlockStore.INDEX_ENTRY.unpack_from(self._index, height * BlockStore.INDEX_ENTRY.size)
+        size, = BlockStore.RECORD_HEADER.unpack_from(self._segment, offset)
+        start = offset + BlockStore.RECORD_HEADER.size
+        return json.loads(self._segment[start:start + size])
+    
+    def _get_base(self, height):
+        """Block tại `height` (phần base): pinned tip -> LRU -> giải mã từ mmap"""
+        if self._pinned is not None and self._pinned[0] == height:
+            return self._pinned[1]
+        
+        block = self._cache.get(height)
+        if block is not None:
+            self._cache.move_to_end(height)
+        else:
+            block = Block.from_dict(self._read_dict(height))
+            self._cache[height] = block
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        
+        if height == self._base_length - 1:
+            self._pinned = (height, block)
+        return block
+    
+    def _detach(self, height):
+        """
+        Chuyển các block base từ `height` trở đi sang `_tail` (trước khi sửa chúng).
+        Giữ nguyên các Block object đã được tạo ra.
+        """
+        if height >= self._base_length:
+            return
+        
+        moved = [self._get_base(h) for h in range(height, self._base_length)]
+        self._truncate_base(height)
+        self._tail[:0] = moved
+    
+    def _truncate_base(self, height):
+        """Bỏ các block base từ `height` trở đi (không materialize)"""
+        self._base_length = height
+        for h in [h for h in self._cache if h >= height]:
+            del self._cache[h]
+        if self._pinned is not None and self._pinned[0] >= height:
+            self._pinned = None
+    
+    def __len__(self):
+        return self._base_length + len(self._tail)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chain index out of range")
+        
+        if index < self._base_length:
+            return self._get_base(index)
+        return self._tail[index - self._base_length]
+    
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            self._detach(start)
+            base = self._base_length
+            self._tail[start - base:stop - base:step] = value
+            return
+        
+        if index < 0:
+            index += len(self)
+        self._detach(index)
+        self._tail[index - self._base_length] = value
+    
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            
+            # Trường hợp thường gặp: cắt đuôi chain (fork) -> không cần materialize
+            if step == 1 and stop >= len(self):
+                if start < self._base_length:
+                    self._truncate_base(start)
+                    self._tail.clear()
+                else:
+                    del self._tail[start - self._base_length:]
+                return
+            
+            self._detach(start)
+            base = self._base_length
+            del self._tail[start - base:stop - base:step]
+            return
+        
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chain index out of range")
+        self._detach(index)
+        del self._tail[index - self._base_length]
+    
+    def insert(self, index, value):
+        if index < 0:
+            index = max(0, index + len(self))
+        index = min(index, len(self))
+        self._detach(index)
+        self._tail.insert(index - self._base_length, value)
+    
+    def append(self, value):
+        self._tail.append(value)
+    
+    def extend(self, values):
+        self._tail.extend(values)
+    
+    def __iter__(self):
+        return self.iter_from(0)
+    
+    def iter_from(self, start=0):
+        """
+        Duyệt tuần tự các block từ `start`, không đưa block vào LRU
+        (quét toàn chain không đẩy các block hay dùng ra khỏi cache)
+        
+        Yields:
+            Block: Các block theo thứ tự
+        """
+        base_length = self._base_length
+        for height in range(start, base_length):
+            if self._pinned is not None and self._pinned[0] == height:
+                yield self._pinned[1]
+            elif height in self._cache:
+                yield self._cache[height]
+            else:
+                yield Block.from_dict(self._read_dict(height))
+        
+        yield from self._tail[max(0, start - base_length):]
+    
+    def get_hash(self, height):
+        """Hash của block tại `height` (phần base đọc thẳng từ index, không giải mã block)"""
+        if height < 0:
+            height += len(self)
+        if height < self._base_length:
+            _, block_hash = BlockStore.INDEX_ENTRY.unpack_from(self._index, height * BlockStore.INDEX_ENTRY.size)
+            return block_hash.rstrip(b'\x00').decode('ascii')
+        return self._tail[height - self._base_length].hash
+    
+    def close(self):
+        """Đóng mmap (view không dùng được phần base sau khi đóng)"""
+        for mapped in (self._segment, self._index):
+            if mapped is not None:
+                mapped.close()
+        self._segment = self._index = None
+
+
+def iter_blocks(chain, start=0):
+    """
+    Duyệt các block của chain từ `start` (list hoặc ChainView)
+    
+    Args:
+        chain (list | ChainView): Chain
+        start (int): Vị trí bắt đầu
+    
+    Yields:
+        Block: Các block theo thứ tự
+    """
+    if isinstance(chain, ChainView):
+        return chain.iter_from(start)
+    return iter(chain[start:])
+
+
+def block_hash_at(chain, height):
+    """
+    Hash của block tại `height` (ChainView đọc từ index, không giải mã block)
+    
+    Args:
+        chain (list | ChainView): Chain
+        height (int): Vị trí block
+    
+    Returns:
+        str: Hash của block
+    """
+    if isinstance(chain, ChainView):
+        return chain.get_hash(height)
+    return chain[height].hash
@@ -0,0 +1,363 @@
+"""
+Codec - Mã hóa nhị phân gọn (struct cố định) cho Block/Transaction khi truyền giữa các node
+"""
+import struct
+from .block import Block, pack_hash, unpack_hash
+from .transaction import Transaction
+
+# Content-Type của payload nhị phân (JSON vẫn là mặc định khi peer không hỗ trợ)
+CONTENT_TYPE = 'application/vnd.sybilchain+binary'
+
+# Header node gửi kèm mọi response để peer biết node hiểu được payload nhị phân
+CODEC_HEADER = 'X-Block-Codec'
+CODEC_NAME = 'binary/1'
+
+VERSION = 1
+
+# [version][flags][index][nonce][số giao dịch]
+BLOCK_HEADER = struct.Struct('>BBqqI')
+# Timestamp ghi theo đúng kiểu (int/float, theo FLAG_INT_TIMESTAMP) để hash JSON tính lại vẫn khớp
+FLOAT = struct.Struct('>d')
+INT = struct.Struct('>q')
+# Chuỗi: [độ dài uint16][utf-8], độ dài NONE_LENGTH = None
+STRING_LENGTH = struct.Struct('>H')
+NONE_LENGTH = 0xFFFF
+# Hash không phải hex 64 ký tự (VD: '0' của genesis): [tag] rồi chuỗi
+HASH_NONE = 0
+HASH_STRING = 1
+# Transaction: [flags][sender][receiver][amount][timestamp], kiểu amount/timestamp theo flags
+TX_FLAGS = struct.Struct('>B')
+TX_INT_AMOUNT = 0x01
+TX_INT_TIMESTAMP = 0x02
+TX_NUMBERS = {
+    0: struct.Struct('>dd'),
+    TX_INT_AMOUNT: struct.Struct('>qd'),
+    TX_INT_TIMESTAMP: struct.Struct('>dq'),
+    TX_INT_AMOUNT | TX_INT_TIMESTAMP: struct.Struct('>qq'),
+}
+# Chain: [số block] rồi từng block [độ dài uint32][block]
+COUNT = struct.Struct('>I')
+
+FLAG_BATCH = 0x01
+FLAG_MINER = 0x02
+FLAG_INT_TIMESTAMP = 0x04
+# hash, previous_hash (và merkle_root của block batch) đều là 32 bytes -> đọc liền một lần
+FLAG_RAW_HASHES = 0x08
+
+
+def _number_flag(value, flag):
+    """Flag kiểu số (int -> `flag`, float -> 0); kiểu khác không mã hóa được"""
+    if type(value) is int:
+        return flag
+    if type(value) is float:
+        return 0
+    raise ValueError(f"Unsupported number type for binary codec: {type(value).__name__}")
+
+
+def _encode_string(value, out):
+    if value is None:
+        out.append(STRING_LENGTH.pack(NONE_LENGTH))
+        return
+    
+    raw = value.encode('utf-8')
+    if len(raw) >= NONE_LENGTH:
+        raise ValueError("String too long for binary codec")
+    out.append(STRING_LENGTH.pack(len(raw)))
+    out.append(raw)
+
+
+def _decode_string(data, offset):
+    length, = STRING_LENGTH.unpack_from(data, offset)
+    offset += STRING_LENGTH.size
+    if length == NONE_LENGTH:
+        return None, offset
+    return str(data[offset:offset + length], 'utf-8'), offset + length
+
+
+def _encode_hash(value, out):
+    """Hash không ở dạng 32 bytes (chuỗi bất thường hoặc None)"""
+    if value is None:
+        out.append(bytes((HASH_NONE,)))
+    else:
+        out.append(bytes((HASH_STRING,)))
+        _encode_string(value, out)
+
+
+def _decode_hash(data, offset):
+    """Trả về dạng lưu trong Block (pack_hash)"""
+    if data[offset] == HASH_STRING:
+        value, offset = _decode_string(data, offset + 1)
+        return pack_hash(value), offset
+    return None, offset + 1
+
+
+def _encode_transaction(transaction, out):
+    flags = (_number_flag(transaction.amount, TX_INT_AMOUNT) |
+             _number_flag(transaction.timestamp, TX_INT_TIMESTAMP))
+    out.append(TX_FLAGS.pack(flags))
+    _encode_string(transaction.sender, out)
+    _encode_string(transaction.receiver, out)
+    try:
+        out.append(TX_NUMBERS[flags].pack(transaction.amount, transaction.timestamp))
+    except struct.error:
+        raise ValueError("Integer out of range for binary codec")
+
+
+def _decode_transaction(data, offset):
+    flags = data[offset]
+    sender, offset = _decode_string(data, offset + 1)
+    receiver, offset = _decode_string(data, offset)
+    numbers = TX_NUMBERS[flags]
+    amount, timestamp = numbers.unpack_from(data, offset)
+    return Transaction(sender, receiver, amount, timestamp), offset + numbers.size
+
+
+def _encode_block(block, out):
+    # Dùng thẳng dạng lưu trong Block (hash là bytes, xem Block.__slots__), không qua hex
+    hashes = [block.hash_bytes, block._previous_hash]
+    if block.is_batch:
+        hashes.append(block._merkle_root)
+    raw_hashes = all(isinstance(value, bytes) for value in hashes)
+    
+    flags = ((FLAG_BATCH if block.is_batch else 0) |
+             (FLAG_MINER if block.miner is not None else 0) |
+             _number_flag(block.timestamp, FLAG_INT_TIMESTAMP) |
+             (FLAG_RAW_HASHES if raw_hashes else 0))
+    try:
+        out.append(BLOCK_HEADER.pack(VERSION, flags, block.index, block.nonce, len(block.transactions)))
+        out.append((INT if flags & FLAG_INT_TIMESTAMP else FLOAT).pack(block.timestamp))
+    except struct.error:
+        raise ValueError("Integer out of range for binary codec")
+    
+    if raw_hashes:
+        out.extend(hashes)
+    else:
+        for value in hashes:
+            _encode_hash(unpack_hash(value), out)
+    if flags & FLAG_MINER:
+        _encode_string(block.miner, out)
+    for transaction in block.transactions:
+        _encode_transaction(transaction, out)
+
+
+def _decode_block(data, offset):
+    version, flags, index, nonce, tx_count = BLOCK_HEADER.unpack_from(data, offset)
+    if version != VERSION:
+        raise ValueError(f"Unsupported block codec version: {version}")
+    offset += BLOCK_HEADER.size
+    
+    timestamp, = (INT if flags & FLAG_INT_TIMESTAMP else FLOAT).unpack_from(data, offset)
+    offset += 8
+    
+    is_batch = flags & FLAG_BATCH
+    merkle_root = None
+    if flags & FLAG_RAW_HASHES:
+        block_hash = bytes(data[offset:offset + 32])
+        previous_hash = bytes(data[offset + 32:offset + 64])
+        offset += 64
+        if is_batch:
+            merkle_root = bytes(data[offset:offset + 32])
+            offset += 32
+    else:
+        block_hash, offset = _decode_hash(data, offset)
+        previous_hash, offset = _decode_hash(data, offset)
+        if is_batch:
+            merkle_root, offset = _decode_hash(data, offset)
+    
+    miner = None
+    if flags & FLAG_MINER:
+        miner, offset = _decode_string(data, offset)
+    
+    transactions = []
+    for _ in range(tx_count):
+        transaction, offset = _decode_transaction(data, offset)
+        transactions.append(transaction)
+    
+    if block_hash is None or (is_batch and merkle_root is None):
+        # Thiếu hash/merkle root -> để Block tự tính
+        if is_batch:
+            return Block(index=index, transactions=transactions, merkle_root=merkle_root,
+                         previous_hash=previous_hash, timestamp=timestamp, nonce=nonce,
+                         miner=miner, hash=block_hash), offset
+        return Block(index=index, transaction=transactions[0] if transactions else None,
+                     previous_hash=previous_hash, timestamp=timestamp, nonce=nonce,
+                     miner=miner, hash=block_hash), offset
+    
+    # Gán thẳng vào slots như Block.__init__ với hash đã biết (hash đã ở dạng lưu trữ)
+    block = Block.__new__(Block)
+    block.index = index
+    block.is_batch = bool(is_batch)
+    block.transactions = transactions
+    block._merkle_root = merkle_root
+    block._previous_hash = previous_hash
+    block.timestamp = timestamp
+    block.nonce = nonce
+    block.miner = miner
+    block._hash = block_hash
+    return block, offset
+
+
+def encode_transaction(transaction):
+    """
+    Mã hóa transaction
+    
+    Args:
+        transaction (Transaction): Giao dịch
+    
+    Returns:
+        bytes: Payload nhị phân
+    
+    Raises:
+        ValueError: Giá trị không biểu diễn được (caller dùng JSON thay thế)
+    """
+    out = [bytes((VERSION,))]
+    _encode_transaction(transaction, out)
+    return b''.join(out)
+
+
+def decode_transaction(data):
+    """Giải mã transaction từ payload của encode_transaction"""
+    if not data or data[0] != VERSION:
+        raise ValueError("Invalid transaction payload")
+    try:
+        return _decode_transaction(memoryview(data), 1)[0]
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid transaction payload: {e}")
+
+
+def encode_block(block):
+    """
+    Mã hóa block (cùng nội dung với Block.to_dict, hash JSON tính lại vẫn khớp)
+    
+    Args:
+        block (Block): Block
+    
+    Returns:
+        bytes: Payload nhị phân
+    
+    Raises:
+        ValueError: Giá trị không biểu diễn được (caller dùng JSON thay thế)
+    """
+    out = []
+    _encode_block(block, out)
+    return b''.join(out)
+
+
+def decode_block(data):
+    """Giải mã block từ payload của encode_block"""
+    try:
+        return _decode_block(memoryview(data), 0)[0]
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid block payload: {e}")
+
+
+def _encode_record(block):
+    record = []
+    _encode_block(block, record)
+    payload = b''.join(record)
+    return COUNT.pack(len(payload)) + payload
+
+
+def encode_blocks(blocks):
+    """
+    Mã hóa danh sách block (VD: response /chain)
+    
+    Args:
+        blocks (iterable): Các Block theo thứ tự
+    
+    Returns:
+        bytes: [số block] + từng block [độ dài][block]
+    """
+    records = [_encode_record(block) for block in blocks]
+    return COUNT.pack(len(records)) + b''.join(records)
+
+
+def iter_encode_blocks(blocks, count):
+    """
+    Mã hóa dần danh sách block (cùng định dạng encode_blocks) để stream response
+    
+    Args:
+        blocks (iterable): Các Block theo thứ tự
+        count (int): Số block sẽ được yield (ghi ở đầu payload)
+    
+    Yields:
+        bytes: Header rồi từng record block
+    """
+    yield COUNT.pack(count)
+    for block in blocks:
+        yield _encode_record(block)
+
+
+def decode_blocks(data):
+    """
+    Giải mã danh sách block từ payload của encode_blocks
+    
+    Returns:
+        list: Các Block
+    """
+    view = memoryview(data)
+    try:
+        count, = COUNT.unpack_from(view, 0)
+        offset = COUNT.size
+        blocks = []
+        for _ in range(count):
+            size, = COUNT.unpack_from(view, offset)
+            offset += COUNT.size
+            block, end = _decode_block(view, offset)
+            if end != offset + size:
+                raise ValueError("Block record length mismatch")
+            blocks.append(block)
+            offset = end
+        return blocks
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid chain payload: {e}")
+
+
+def iter_decode_blocks(chunks):
+    """
+    Giải mã dần payload của encode_blocks từ các chunk (VD: response.iter_content),
+    block được yield ngay khi record của nó đã nhận đủ
+    
+    Args:
+        chunks (iterable): Các đoạn bytes theo thứ tự
+    
+    Yields:
+        Block: Các block theo thứ tự
+    
+    Raises:
+        ValueError: Payload lỗi hoặc bị cắt giữa chừng
+    """
+    buffer = bytearray()
+    count = None
+    decoded = 0
+    
+    try:
+        for chunk in chunks:
+            buffer.extend(chunk)
+            offset = 0
+            
+            if count is None:
+                if len(buffer) < COUNT.size:
+                    continue
+                count, = COUNT.unpack_from(buffer, 0)
+                offset = COUNT.size
+            
+            while decoded < count and len(buffer) - offset >= COUNT.size:
+                size, = COUNT.unpack_from(buffer, offset)
+                start = offset + COUNT.size
+                if len(buffer) - start < size:
+                    break
+                
+                block, end = _decode_block(bytes(buffer[start:start + size]), 0)
+                if end != size:
+                    raise ValueError("Block record length mismatch")
+                yield block
+                decoded += 1
+                offset = start + size
+            
+            del buffer[:offset]
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid chain payload: {e}")
+    
+    if count is None or decoded != count or buffer:
+        raise ValueError(f"Truncated chain stream ({decoded}/{count} blocks)")
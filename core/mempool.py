@@ -0,0 +1,164 @@
+"""
+Mempool - Pool các giao dịch pending, có index để dedup và tra cứu O(1)
+"""
+from collections import OrderedDict
+
+
+class Mempool:
+    def __init__(self, transactions=()):
+        """
+        Khởi tạo mempool
+        
+        Args:
+            transactions (iterable): Các giao dịch ban đầu (theo thứ tự)
+        """
+        # tx_hash -> Transaction, giữ thứ tự nhận (FIFO khi mining)
+        self._transactions = OrderedDict()
+        
+        # address -> [tổng pending (+nhận / -gửi), số giao dịch liên quan]
+        self._pending = {}
+        
+        for transaction in transactions:
+            self.add(transaction)
+    
+    def _update_pending(self, address, amount, count):
+        """Cập nhật running pending balance của một địa chỉ"""
+        entry = self._pending.setdefault(address, [0, 0])
+        entry[0] += amount
+        entry[1] += count
+        
+        # Xóa hẳn khi không còn giao dịch nào (tránh sai số float tích lũy)
+        if entry[1] == 0:
+            del self._pending[address]
+    
+    def _index(self, transaction, sign):
+        self._update_pending(transaction.sender, -sign * transaction.amount, sign)
+        self._update_pending(transaction.receiver, sign * transaction.amount, sign)
+    
+    def add(self, transaction):
+        """
+        Thêm giao dịch vào cuối pool
+        
+        Args:
+            transaction (Transaction): Giao dịch cần thêm
+        
+        Returns:
+            bool: True nếu thêm mới, False nếu đã tồn tại
+        """
+        tx_hash = transaction.calculate_hash()
+        
+        if tx_hash in self._transactions:
+            return False
+        
+        self._transactions[tx_hash] = transaction
+        self._index(transaction, 1)
+        return True
+    
+    # Tương thích với API list cũ (pending_transactions.append)
+    append = add
+    
+    def add_first(self, transaction):
+        """
+        Đưa giao dịch lên đầu pool (VD: trả lại giao dịch khi mining bị cancel)
+        
+        Args:
+            transaction (Transaction): Giao dịch
+        """
+        if self.add(transaction):
+            self._transactions.move_to_end(transaction.calculate_hash(), last=False)
+    
+    def pop_first(self):
+        """
+        Lấy giao dịch cũ nhất ra khỏi pool
+        
+        Returns:
+            Transaction: Giao dịch (hoặc None nếu pool rỗng)
+        """
+        if not self._transactions:
+            return None
+        
+        _, transaction = self._transactions.popitem(last=False)
+        self._index(transaction, -1)
+        return transaction
+    
+    def take(self, max_count, max_bytes=None):
+        """
+        Lấy một batch giao dịch cũ nhất ra khỏi pool để đưa vào block
+        
+        Args:
+            max_count (int): Số giao dịch tối đa
+            max_bytes (int): Tổng kích thước (bytes JSON) tối đa (None = không giới hạn)
+        
+        Returns:
+            list: Danh sách giao dịch (luôn có ít nhất 1 nếu pool không rỗng)
+        """
+        batch = []
+        total_bytes = 0
+        
+        for transaction in self._transactions.values():
+            if len(batch) >= max_count:
+                break
+            
+            size = len(transaction.to_json())
+            if batch and max_bytes is not None and total_bytes + size > max_bytes:
+                break
+            
+            batch.append(transaction)
+            total_bytes += size
+        
+        for transaction in batch:
+            self.discard(transaction)
+        
+        return batch
+    
+    def discard(self, transaction):
+        """
+        Xóa giao dịch khỏi pool nếu có (VD: giao dịch đã nằm trong block)
+        
+        Args:
+            transaction (Transaction): Giao dịch cần xóa
+        
+        Returns:
+            bool: True nếu đã xóa
+        """
+        removed = self._transactions.pop(transaction.calculate_hash(), None)
+        
+        if removed is None:
+            return False
+        
+        self._index(removed, -1)
+        return True
+    
+    def get(self, tx_hash):
+        """Lấy giao dịch theo hash (hoặc None)"""
+        return self._transactions.get(tx_hash)
+    
+    def pending_balance(self, address):
+        """
+        Tổng pending (nhận - gửi) của một địa chỉ, O(1)
+        
+        Args:
+            address (str): Địa chỉ
+        
+        Returns:
+            float: Số dư pending
+        """
+        entry = self._pending.get(address)
+        return entry[0] if entry else 0
+    
+    def clear(self):
+        """Xóa toàn bộ pool"""
+        self._transactions.clear()
+        self._pending.clear()
+    
+    def __contains__(self, transaction):
+        return transaction.calculate_hash() in self._transactions
+    
+    def __iter__(self):
+        return iter(list(self._transactions.values()))
+    
+    def __len__(self):
+        return len(self._transactions)
+    
+    def __repr__(self):
+        return f"Mempool(size={len(self._transactions)})"
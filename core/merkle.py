@@ -0,0 +1,36 @@
+"""
+Merkle Tree - Tính Merkle root cho danh sách giao dịch trong block
+"""
+import hashlib
+
+
+# Merkle root của block không có giao dịch nào
+EMPTY_MERKLE_ROOT = '0' * 64
+
+
+def compute_merkle_root(tx_hashes):
+    """
+    Tính Merkle root từ danh sách hash giao dịch (kiểu Bitcoin: nếu số node
+    lẻ thì nhân đôi node cuối)
+    
+    Args:
+        tx_hashes (list): Danh sách hash (hex) của các giao dịch
+    
+    Returns:
+        str: Merkle root (hex)
+    """
+    if not tx_hashes:
+        return EMPTY_MERKLE_ROOT
+    
+    level = [bytes.fromhex(tx_hash) for tx_hash in tx_hashes]
+    
+    while len(level) > 1:
+        if len(level) % 2 == 1:
+            level.append(level[-1])
+        
+        level = [
+            hashlib.sha256(level[i] + level[i + 1]).digest()
+            for i in range(0, len(level), 2)
+        ]
+    
+    return level[0].hex()
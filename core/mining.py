@@ -0,0 +1,210 @@
+"""
+Parallel Mining - Chia không gian nonce cho nhiều process để mining song song
+"""
+import hashlib
+import json
+import os
+import multiprocessing
+from collections import deque
+import config
+
+
+# Số nonce mỗi worker thử trong một lần nhận việc
+NONCE_CHUNK_SIZE = 20000
+
+# Cứ mỗi bao nhiêu nonce thì worker kiểm tra cờ cancel một lần
+CANCEL_CHECK_INTERVAL = 2048
+
+# Cờ cancel dùng chung giữa các worker (được set bởi pool initializer)
+_stop_event = None
+
+
+def resolve_workers(workers=None):
+    """
+    Xác định số process dùng để mining
+    
+    Args:
+        workers (int): Số worker (None = config.MINING_WORKERS, 0 = tất cả CPU cores)
+    
+    Returns:
+        int: Số worker thực tế (>= 1)
+    """
+    if workers is None:
+        workers = config.MINING_WORKERS
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _init_worker(stop_event):
+    """Pool initializer - lưu cờ cancel cho worker"""
+    global _stop_event
+    _stop_event = stop_event
+
+
+class HeaderHasher:
+    # Placeholder đặt vào vị trí nonce để tách phần header cố định
+    NONCE_PLACEHOLDER = '__NONCE__'
+    
+    def __init__(self, header):
+        """
+        Fast path cho PoW: serialize phần không đổi của header một lần.
+        
+        JSON của header (sort_keys=True) được tách thành prefix (trước nonce)
+        và suffix (sau nonce). SHA256 state của prefix được tính sẵn, mỗi lần
+        thử chỉ cần copy state, nối chữ số nonce và suffix. Kết quả trùng
+        byte-for-byte với Block.calculate_hash.
+        
+        Args:
+            header (dict): Dữ liệu block được hash (Block.header_dict())
+        """
+        header = dict(header)
+        header['nonce'] = self.NONCE_PLACEHOLDER
+        block_string = json.dumps(header, sort_keys=True)
+        
+        marker = f'"nonce": "{self.NONCE_PLACEHOLDER}"'
+        if block_string.count(marker) != 1:
+            raise ValueError("Cannot locate nonce field in block header")
+        
+        prefix, _, suffix = block_string.partition(marker)
+        self._prefix_state = hashlib.sha256((prefix + '"nonce": ').encode())
+        self._suffix = suffix.encode()
+    
+    def digest(self, nonce):
+        """SHA256 digest (bytes) của header với nonce cho trước"""
+        sha = self._prefix_state.copy()
+        sha.update(b'%d' % nonce)
+        sha.update(self._suffix)
+        return sha.digest()
+    
+    def hash(self, nonce):
+        """Hash hex của header với nonce cho trước (giống Block.calculate_hash)"""
+        return self.digest(nonce).hex()
+    
+    def search(self, difficulty, start, end=None, stop_event=None):
+        """
+        Tìm nonce nhỏ nhất trong [start, end) thỏa mãn độ khó
+        
+        Args:
+            difficulty (int): Độ khó (số lượng số 0 hex đầu hash)
+            start (int): Nonce bắt đầu
+            end (int): Nonce kết thúc (None = không giới hạn)
+            stop_event (Event): Cờ cancel, kiểm tra mỗi CANCEL_CHECK_INTERVAL nonce
+        
+        Returns:
+            tuple: (nonce, hash) nếu tìm thấy, None nếu hết khoảng hoặc bị cancel
+        """
+        # So sánh trên bytes thay vì hex: difficulty//2 byte đầu bằng 0,
+        # nếu difficulty lẻ thì byte tiếp theo < 0x10
+        zero_bytes = b'\x00' * (difficulty // 2)
+        full = len(zero_bytes)
+        odd = difficulty % 2
+        
+        prefix_copy = self._prefix_state.copy
+        suffix = self._suffix
+        
+        block_start = start
+        while end is None or block_start < end:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            
+            block_end = block_start + CANCEL_CHECK_INTERVAL
+            if end is not None:
+                block_end = min(block_end, end)
+            
+            for nonce in range(block_start, block_end):
+                sha = prefix_copy()
+                sha.update(b'%d' % nonce)
+                sha.update(suffix)
+                digest = sha.digest()
+                
+                if digest[:full] == zero_bytes and (not odd or digest[full] < 0x10):
+                    return nonce, digest.hex()
+            
+            block_start = block_end
+        
+        return None
+
+
+def _search_range(header, difficulty, start, end):
+    """
+    Thử các nonce trong khoảng [start, end) (chạy trong worker process)
+    
+    Args:
+        header (dict): Dữ liệu block được hash (Block.header_dict())
+        difficulty (int): Độ khó
+        start (int): Nonce bắt đầu
+        end (int): Nonce kết thúc (không bao gồm)
+    
+    Returns:
+        tuple: (nonce, hash) nếu tìm thấy, None nếu không tìm thấy hoặc bị cancel
+    """
+    return HeaderHasher(header).search(difficulty, start, end, _stop_event)
+
+
+class ParallelMiner:
+    def __init__(self, workers=None, chunk_size=NONCE_CHUNK_SIZE):
+        """
+        Khởi tạo Parallel Miner
+        
+        Args:
+            workers (int): Số process (None = config.MINING_WORKERS, 0 = tất cả CPU cores)
+            chunk_size (int): Số nonce mỗi chunk
+        """
+        self.workers = resolve_workers(workers)
+        self.chunk_size = chunk_size
+    
+    def mine(self, block, difficulty, cancel_event=None):
+        """
+        Mine block bằng nhiều process.
+        
+        Các chunk nonce được giao theo thứ tự tăng dần và kết quả được đọc
+        theo đúng thứ tự đó, nên nonce tìm được luôn là nonce nhỏ nhất hợp lệ -
+        block thu được giống hệt kết quả của Block.mine_block single-thread.
+        
+        Args:
+            block (Block): Block cần mine (nonce, hash được cập nhật tại chỗ)
+            difficulty (int): Độ khó
+            cancel_event (threading.Event): Set event này để dừng mining
+        
+        Returns:
+            bool: True nếu mine thành công, False nếu bị cancel
+        """
+        header = block.header_dict()
+        ctx = multiprocessing.get_context()
+        stop_event = ctx.Event()
+        next_start = block.nonce
+        
+        with ctx.Pool(self.workers, initializer=_init_worker, initargs=(stop_event,)) as pool:
+            pending = deque()
+            
+            def submit():
+                nonlocal next_start
+                end = next_start + self.chunk_size
+                pending.append(pool.apply_async(_search_range, (header, difficulty, next_start, end)))
+                next_start = end
+            
+            # Giữ mỗi worker luôn có việc, nhưng không đẩy vô hạn chunk vào queue
+            for _ in range(self.workers * 2):
+                submit()
+            
+            while True:
+                result = pending[0]
+                
+                while not result.ready():
+                    if cancel_event is not None and cancel_event.is_set():
+                        stop_event.set()
+                        pool.terminate()
+                        return False
+                    result.wait(0.05)
+                
+                found = result.get()
+                pending.popleft()
+                
+                if found is not None:
+                    stop_event.set()
+                    pool.terminate()
+                    block.nonce, block.hash = found
+                    return True
+                
+                submit()
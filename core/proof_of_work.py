@@ -3,6 +3,7 @@ Proof of Work implementation
 """
 import hashlib
 import time
+from .mining import HeaderHasher, ParallelMiner, resolve_workers
 
 
 class ProofOfWork:
@@ -16,37 +17,54 @@ class ProofOfWork:
         self.difficulty = difficulty
         self.target = '0' * difficulty
     
-    def mine(self, block):
+    def mine(self, block, workers=None):
         """
         Mine một block
         
         Args:
             block (Block): Block cần mine
+            workers (int): Số process mining (None = config.MINING_WORKERS, 0 = tất cả CPU cores)
         
         Returns:
             tuple: (hash, nonce, time_elapsed)
         """
         start_time = time.time()
-        nonce = 0
+        
+        if resolve_workers(workers) > 1:
+            miner = ParallelMiner(workers)
+            print(f"Mining with difficulty {self.difficulty} on {miner.workers} processes...")
+            
+            block.nonce = 0
+            miner.mine(block, self.difficulty)
+            elapsed_time = time.time() - start_time
+            print(f"Block mined in {elapsed_time:.2f} seconds!")
+            print(f"Hash: {block.hash}")
+            print(f"Nonce: {block.nonce}")
+            return block.hash, block.nonce, elapsed_time
         
         print(f"Mining with difficulty {self.difficulty}...")
         
+        # Fast path: chỉ serialize phần header cố định một lần
+        block.nonce = 0
+        hasher = HeaderHasher(block.header_dict())
+        nonce = 0
+        
         while True:
-            block.nonce = nonce
-            hash_result = block.calculate_hash()
+            found = hasher.search(self.difficulty, nonce, nonce + 100000)
             
-            if hash_result[:self.difficulty] == self.target:
+            if found:
+                nonce, hash_result = found
+                block.nonce = nonce
                 elapsed_time = time.time() - start_time
                 print(f"Block mined in {elapsed_time:.2f} seconds!")
                 print(f"Hash: {hash_result}")
                 print(f"Nonce: {nonce}")
                 return hash_result, nonce, elapsed_time
             
-            nonce += 1
+            nonce += 100000
             
             # Progress indicator
-            if nonce % 100000 == 0:
-                print(f"Tried {nonce} hashes...")
+            print(f"Tried {nonce} hashes...")
     
     @staticmethod
     def validate_proof(block, difficulty):
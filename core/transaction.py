@@ -1,11 +1,14 @@
 """
 Transaction class - Đại diện cho một giao dịch trong blockchain
 """
+import hashlib
 import json
 from datetime import datetime
 
 
 class Transaction:
+    __slots__ = ('sender', 'receiver', 'amount', 'timestamp')
+    
     def __init__(self, sender, receiver, amount, timestamp=None):
         """
         Khởi tạo giao dịch
@@ -34,6 +37,10 @@ class Transaction:
         """Chuyển transaction thành JSON string"""
         return json.dumps(self.to_dict(), sort_keys=True)
     
+    def calculate_hash(self):
+        """Hash nội dung giao dịch (dùng để dedup trong mempool)"""
+        return hashlib.sha256(self.to_json().encode()).hexdigest()
+    
     @staticmethod
     def from_dict(data):
         """Tạo Transaction từ dictionary"""
@@ -136,13 +136,9 @@ class EclipseAttackDemo:
                 node = Node(username=username)
                 
                 # Load blockchain (from registration)
-                account_data = self.user_manager.get_account_data(username)
-                if account_data and account_data.get('blockchain'):
-                    from core.blockchain import Blockchain
-                    node.blockchain = Blockchain.from_list(
-                        account_data['blockchain'],
-                        owner_address=username
-                    )
+                blockchain = self.user_manager.load_blockchain(username)
+                if blockchain is not None:
+                    node.blockchain = blockchain
                 
                 # Start node
                 node.start()
@@ -134,13 +134,9 @@ class EclipseAttackDemoV2:
             try:
                 node = Node(username=username)
                 
-                account_data = self.user_manager.get_account_data(username)
-                if account_data and account_data.get('blockchain'):
-                    from core.blockchain import Blockchain
-                    node.blockchain = Blockchain.from_list(
-                        account_data['blockchain'],
-                        owner_address=username
-                    )
+                blockchain = self.user_manager.load_blockchain(username)
+                if blockchain is not None:
+                    node.blockchain = blockchain
                 
                 node.start()
                 time.sleep(0.1)
@@ -172,19 +172,17 @@ class BlockchainSystem:
             self.current_node = Node(username=username)
             
             # Load blockchain từ account
-            if account_data.get('blockchain'):
-                try:
-                    self.current_node.blockchain = Blockchain.from_list(
-                        account_data['blockchain'],
-                        owner_address=username
-                    )
+            try:
+                blockchain = self.user_manager.load_blockchain(username)
+                if blockchain is not None:
+                    self.current_node.blockchain = blockchain
                     print(f"✅ Blockchain loaded (Length: {len(self.current_node.blockchain.chain)})")
                     
                     # Hiển thị balance (chỉ confirmed)
                     balance = self.current_node.blockchain.get_balance(username)
                     print(f"💰 Confirmed balance: {balance} coins")
-                except Exception as e:
-                    print(f"⚠️ Failed to load blockchain: {str(e)}, using new one")
+            except Exception as e:
+                print(f"⚠️ Failed to load blockchain: {str(e)}, using new one")
             
             # Start node
             self.current_node.start()
@@ -224,8 +222,7 @@ class BlockchainSystem:
         
         # Lưu blockchain vào account
         if self.current_node:
-            blockchain_data = self.current_node.blockchain.to_list()
-            self.user_manager.update_account(self.current_user, blockchain_data=blockchain_data)
+            self.user_manager.save_blockchain(self.current_user, self.current_node.blockchain)
             
             # Unregister từ network
             self.network_manager.unregister_node(self.current_node.node_id)
@@ -292,8 +289,7 @@ class BlockchainSystem:
             
             # Auto-save blockchain with pending transaction
             print(f"💾 Saving blockchain...")
-            blockchain_data = self.current_node.blockchain.to_list()
-            self.user_manager.update_account(self.current_user, blockchain_data=blockchain_data)
+            self.user_manager.save_blockchain(self.current_user, self.current_node.blockchain)
             print(f"✅ Blockchain saved!")
         except ValueError as e:
             print(f"\n❌ Transaction failed: {str(e)}")
@@ -324,8 +320,7 @@ class BlockchainSystem:
             
             # Auto-save blockchain after mining
             print(f"💾 Saving blockchain...")
-            blockchain_data = self.current_node.blockchain.to_list()
-            self.user_manager.update_account(self.current_user, blockchain_data=blockchain_data)
+            self.user_manager.save_blockchain(self.current_user, self.current_node.blockchain)
             print(f"✅ Blockchain saved!")
     
     def check_balance(self):
@@ -402,8 +397,7 @@ class BlockchainSystem:
             print("✅ Blockchain updated with longer chain from peers!")
             # Save the new blockchain
             print(f"💾 Saving blockchain...")
-            blockchain_data = self.current_node.blockchain.to_list()
-            self.user_manager.update_account(self.current_user, blockchain_data=blockchain_data)
+            self.user_manager.save_blockchain(self.current_user, self.current_node.blockchain)
             print(f"✅ Blockchain saved!")
         else:
             print("✅ Your blockchain is up to date!")
@@ -1,5 +1,6 @@
 from .node import Node
 from .network_manager import NetworkManager
 from .peer_discovery import PeerDiscovery
+from .peer_client import PeerClient
 
-__all__ = ['Node', 'NetworkManager', 'PeerDiscovery']
+__all__ = ['Node', 'NetworkManager', 'PeerDiscovery', 'PeerClient']
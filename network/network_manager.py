@@ -1,37 +1,29 @@
 """
 Network Manager - Quản lý danh sách tất cả nodes trong mạng
 """
-import json
-import os
-import config
+from network.registry import create_registry, make_node_info
 
 
 class NetworkManager:
-    def __init__(self):
-        """Khởi tạo Network Manager"""
-        self.network_file = config.NETWORK_FILE
-        self.nodes = self.load_network()
+    def __init__(self, network_file=None, backend=None):
+        """
+        Khởi tạo Network Manager
+        
+        Args:
+            network_file (str): Đường dẫn file registry (None = theo config của backend)
+            backend (str): 'json' hoặc 'sqlite' (None = config.NETWORK_BACKEND)
+        """
+        self.registry = create_registry(backend, network_file)
+        self.network_file = self.registry.path
     
-    def load_network(self):
+    def batch(self):
         """
-        Load danh sách nodes từ file
+        Gom nhiều thay đổi registry thành một lần ghi (JSON) / một transaction (SQLite)
         
         Returns:
-            dict: Dictionary với key là node_id, value là node info
+            contextmanager: Dùng với `with network_manager.batch(): ...`
         """
-        if not os.path.exists(self.network_file):
-            return {}
-        
-        try:
-            with open(self.network_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    
-    def save_network(self):
-        """Lưu danh sách nodes vào file"""
-        with open(self.network_file, 'w', encoding='utf-8') as f:
-            json.dump(self.nodes, f, indent=2, ensure_ascii=False)
+        return self.registry.batch()
     
     def register_node(self, node_id, host, port, username):
         """
@@ -43,35 +35,25 @@ class NetworkManager:
             port (int): Port number
             username (str): Tên người dùng
         """
-        # Reload từ file để đảm bảo dữ liệu mới nhất
-        self.nodes = self.load_network()
-        
-        # Kiểm tra và xóa nodes cũ của cùng username hoặc cùng port
-        nodes_to_remove = []
-        for existing_id, existing_node in self.nodes.items():
-            if existing_node['username'] == username and existing_id != node_id:
-                nodes_to_remove.append(existing_id)
-                print(f"⚠️ Found duplicate username node: {existing_id[:8]}..., will remove")
-            elif existing_node['port'] == port and existing_id != node_id:
-                nodes_to_remove.append(existing_id)
-                print(f"⚠️ Found duplicate port node: {existing_id[:8]}..., will remove")
-        
-        # Xóa các nodes trùng lặp
-        for old_id in nodes_to_remove:
-            self.unregister_node(old_id)
-        
-        # Đăng ký node mới
-        self.nodes[node_id] = {
-            'node_id': node_id,
-            'host': host,
-            'port': port,
-            'username': username,
-            'url': f"http://{host}:{port}",
-            'is_active': True
-        }
-        self.save_network()
+        # Nodes cũ của cùng username hoặc cùng port bị thay thế
+        removed = self.registry.add_node(make_node_info(node_id, host, port, username))
+        
+        for old_id, reason in removed:
+            print(f"⚠️ Found duplicate {reason} node: {old_id[:8]}..., will remove")
+            print(f"Node {old_id} unregistered from network")
         print(f"Node {node_id[:8]}... registered to network")
     
+    def register_many(self, nodes):
+        """
+        Đăng ký nhiều nodes với một lần ghi registry
+        
+        Args:
+            nodes (list): Danh sách dict {'node_id', 'host', 'port', 'username'}
+        """
+        with self.batch():
+            for node in nodes:
+                self.register_node(node['node_id'], node['host'], node['port'], node['username'])
+    
     def unregister_node(self, node_id):
         """
         Xóa node khỏi mạng
@@ -79,14 +61,20 @@ class NetworkManager:
         Args:
             node_id (str): ID của node
         """
-        # Reload từ file để đảm bảo dữ liệu mới nhất
-        self.nodes = self.load_network()
-        
-        if node_id in self.nodes:
-            del self.nodes[node_id]
-            self.save_network()
+        if self.registry.remove_node(node_id):
             print(f"Node {node_id} unregistered from network")
     
+    def unregister_many(self, node_ids):
+        """
+        Xóa nhiều nodes với một lần ghi registry
+        
+        Args:
+            node_ids (list): Danh sách node_id
+        """
+        with self.batch():
+            for node_id in node_ids:
+                self.unregister_node(node_id)
+    
     def get_node(self, node_id):
         """
         Lấy thông tin một node
@@ -97,9 +85,7 @@ class NetworkManager:
         Returns:
             dict: Thông tin node
         """
-        # Reload từ file để đảm bảo dữ liệu mới nhất
-        self.nodes = self.load_network()
-        return self.nodes.get(node_id)
+        return self.registry.get_node(node_id)
     
     def get_all_nodes(self):
         """
@@ -108,9 +94,7 @@ class NetworkManager:
         Returns:
             list: Danh sách nodes
         """
-        # Reload từ file để đảm bảo dữ liệu mới nhất
-        self.nodes = self.load_network()
-        return list(self.nodes.values())
+        return self.registry.get_all_nodes()
     
     def get_active_nodes(self):
         """
@@ -119,9 +103,7 @@ class NetworkManager:
         Returns:
             list: Danh sách active nodes
         """
-        # Reload từ file để đảm bảo dữ liệu mới nhất
-        self.nodes = self.load_network()
-        return [node for node in self.nodes.values() if node.get('is_active', True)]
+        return self.registry.get_active_nodes()
     
     def get_random_nodes(self, count, exclude_ids=None):
         """
@@ -134,16 +116,7 @@ class NetworkManager:
         Returns:
             list: Danh sách nodes ngẫu nhiên
         """
-        import random
-        
-        exclude_ids = exclude_ids or []
-        available_nodes = [
-            node for node in self.get_active_nodes()
-            if node['node_id'] not in exclude_ids
-        ]
-        
-        count = min(count, len(available_nodes))
-        return random.sample(available_nodes, count)
+        return self.registry.sample_active_nodes(count, exclude_ids or [])
     
     def mark_node_inactive(self, node_id):
         """
@@ -152,12 +125,7 @@ class NetworkManager:
         Args:
             node_id (str): ID của node
         """
-        # Reload từ file để đảm bảo dữ liệu mới nhất
-        self.nodes = self.load_network()
-        
-        if node_id in self.nodes:
-            self.nodes[node_id]['is_active'] = False
-            self.save_network()
+        self.registry.set_active(node_id, False)
     
     def mark_node_active(self, node_id):
         """
@@ -166,12 +134,7 @@ class NetworkManager:
         Args:
             node_id (str): ID của node
         """
-        # Reload từ file để đảm bảo dữ liệu mới nhất
-        self.nodes = self.load_network()
-        
-        if node_id in self.nodes:
-            self.nodes[node_id]['is_active'] = True
-            self.save_network()
+        self.registry.set_active(node_id, True)
     
     def get_network_size(self):
         """
@@ -180,20 +143,21 @@ class NetworkManager:
         Returns:
             int: Số lượng nodes
         """
-        # Reload từ file để đảm bảo dữ liệu mới nhất
-        self.nodes = self.load_network()
-        return len(self.nodes)
+        return self.registry.count()
+    
+    def close(self):
+        """Giải phóng tài nguyên của registry backend"""
+        self.registry.close()
     
     def display_network(self):
         """Hiển thị thông tin mạng"""
-        # Reload từ file để đảm bảo dữ liệu mới nhất
-        self.nodes = self.load_network()
+        nodes = self.get_all_nodes()
         
         print("\n" + "="*80)
-        print(f"NETWORK STATUS (Total Nodes: {self.get_network_size()})")
+        print(f"NETWORK STATUS (Total Nodes: {len(nodes)})")
         print("="*80)
         
-        for node in self.get_all_nodes():
+        for node in nodes:
             status = "🟢 ACTIVE" if node.get('is_active', True) else "🔴 INACTIVE"
             print(f"\n{status} {node['username']} ({node['node_id']})")
             print(f"  URL: {node['url']}")
@@ -2,14 +2,73 @@
 Node class - Đại diện cho một node trong mạng P2P blockchain
 """
 import json
+import time
 import uuid
-import requests
-from flask import Flask, request, jsonify
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from flask import Flask, Response, request, jsonify
+from werkzeug.serving import WSGIRequestHandler
 from threading import Thread
 import config
 from core.blockchain import Blockchain
 from core.transaction import Transaction
 from core.block import Block
+from core.chain_view import iter_blocks
+from core import codec
+from network.peer_client import PeerClient
+from network.peer_health import PeerHealthMonitor
+
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def coalesce_chunks(pieces, size=None):
+    """
+    Gộp các mảnh nhỏ (str/bytes) thành chunk khoảng `size` bytes trước khi gửi,
+    tránh mỗi block một lần write/chunk HTTP khi stream response
+    
+    Args:
+        pieces (iterable): Các mảnh str hoặc bytes
+        size (int): Kích thước chunk (None = config.STREAM_CHUNK_BYTES)
+    
+    Yields:
+        bytes: Các chunk
+    """
+    size = size or config.STREAM_CHUNK_BYTES
+    buffer = []
+    buffered = 0
+    
+    for piece in pieces:
+        if isinstance(piece, str):
+            piece = piece.encode('utf-8')
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered = 0
+    
+    if buffer:
+        yield b''.join(buffer)
+
+
+def iter_json_chain(blocks, length):
+    """Response JSON {'chain': [...], 'length'} sinh dần từng block (tương thích client cũ)"""
+    yield '{"chain":['
+    for i, block in enumerate(blocks):
+        yield (',' if i else '') + json.dumps(block.to_dict(), separators=(',', ':'))
+    yield f'],"length":{length}}}'
+
+
+def iter_ndjson_chain(blocks):
+    """Mỗi block một dòng JSON (NDJSON)"""
+    for block in blocks:
+        yield json.dumps(block.to_dict(), separators=(',', ':')) + '\n'
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    # HTTP/1.1 để peers giữ được kết nối keep-alive (mặc định HTTP/1.0 đóng sau mỗi request)
+    protocol_version = 'HTTP/1.1'
 
 
 class Node:
@@ -39,6 +98,15 @@ class Node:
         
         # Server thread
         self.server_thread = None
+        
+        # HTTP client giữ kết nối keep-alive đến từng peer
+        self.peer_client = PeerClient()
+        
+        # Thread pool cho broadcast / health probe song song (tạo khi cần)
+        self.executor = None
+        
+        # Trạng thái liveness của peers (heartbeat thread chạy khi gọi start_heartbeat)
+        self.health_monitor = PeerHealthMonitor(self)
     
     def find_available_port(self):
         """
@@ -60,9 +128,34 @@ class Node:
         
         raise Exception("No available port found!")
     
+    def response_format(self, stream=False):
+        """
+        Chọn định dạng response theo header Accept của request hiện tại
+        (JSON được ưu tiên khi ngang nhau, VD: Accept: */*)
+        
+        Args:
+            stream (bool): Route có hỗ trợ NDJSON không
+        
+        Returns:
+            str: 'application/json', NDJSON_CONTENT_TYPE hoặc codec.CONTENT_TYPE
+        """
+        offered = ['application/json']
+        if stream:
+            offered.append(NDJSON_CONTENT_TYPE)
+        if config.BINARY_CODEC:
+            offered.append(codec.CONTENT_TYPE)
+        return request.accept_mimetypes.best_match(offered, default='application/json')
+    
     def setup_routes(self):
         """Setup Flask API routes"""
         
+        @self.app.after_request
+        def advertise_codec(response):
+            """Báo cho peer biết node hiểu payload nhị phân (xem PeerClient.supports_binary)"""
+            if config.BINARY_CODEC:
+                response.headers[codec.CODEC_HEADER] = codec.CODEC_NAME
+            return response
+        
         @self.app.route('/ping', methods=['GET'])
         def ping():
             """Health check endpoint"""
@@ -79,17 +172,81 @@ class Node:
                 'chain_length': len(self.blockchain.chain),
                 'peers_count': len(self.peers),
                 'peers': list(self.peers.keys()),  # Add peer list for debugging
-                'pending_transactions': len(self.blockchain.pending_transactions)
+                'pending_transactions': len(self.blockchain.pending_transactions),
+                'peer_pool': self.peer_client.get_stats()
             })
         
         @self.app.route('/chain', methods=['GET'])
         def get_chain():
-            """Lấy toàn bộ blockchain"""
+            """
+            Lấy các block trong khoảng [from, to), tối đa `limit` block (mặc định toàn bộ chain).
+            Response được stream từng phần (JSON, NDJSON hoặc nhị phân theo Accept),
+            không dựng cả chain trong bộ nhớ.
+            """
+            chain = self.blockchain.chain
+            length = len(chain)
+            start = max(0, request.args.get('from', 0, type=int))
+            end = min(request.args.get('to', length, type=int), length)
+            limit = request.args.get('limit', type=int)
+            if limit is not None:
+                end = min(end, start + max(0, limit))
+            end = max(start, end)
+            
+            blocks = islice(iter_blocks(chain, start), end - start)
+            mimetype = self.response_format(stream=True)
+            
+            if mimetype == codec.CONTENT_TYPE:
+                body = codec.iter_encode_blocks(blocks, end - start)
+            elif mimetype == NDJSON_CONTENT_TYPE:
+                body = iter_ndjson_chain(blocks)
+            else:
+                body = iter_json_chain(blocks, length)
+            
+            return Response(coalesce_chunks(body), mimetype=mimetype, headers={
+                'X-Chain-Length': str(length),
+                'X-Chain-From': str(start),
+                'X-Chain-To': str(end)
+            })
+        
+        @self.app.route('/chain/tip', methods=['GET'])
+        def get_chain_tip():
+            """Lấy height và hash của block cuối (bước đầu của headers-first sync)"""
+            latest = self.blockchain.get_latest_block()
             return jsonify({
-                'chain': self.blockchain.to_list(),
+                'height': len(self.blockchain.chain) - 1,
+                'length': len(self.blockchain.chain),
+                'hash': latest.hash if latest else None
+            })
+        
+        @self.app.route('/chain/locate', methods=['POST'])
+        def locate_fork():
+            """Tìm block chung cao nhất từ block locator của peer"""
+            data = request.get_json() or {}
+            locator = data.get('locator', [])
+            
+            return jsonify({
+                'fork_height': self.blockchain.find_fork_height(locator),
                 'length': len(self.blockchain.chain)
             })
         
+        @self.app.route('/chain/blocks', methods=['GET'])
+        def get_chain_blocks():
+            """Lấy các block trong khoảng [start, end) (tối đa SYNC_BATCH_SIZE)"""
+            length = len(self.blockchain.chain)
+            start = max(0, request.args.get('start', 0, type=int))
+            end = request.args.get('end', length, type=int)
+            end = min(end, length, start + config.SYNC_BATCH_SIZE)
+            
+            if self.response_format() == codec.CONTENT_TYPE:
+                return Response(codec.encode_blocks(self.blockchain.chain[start:end]), mimetype=codec.CONTENT_TYPE,
+                                headers={'X-Chain-Start': str(start), 'X-Chain-Length': str(length)})
+            
+            return jsonify({
+                'blocks': [block.to_dict() for block in self.blockchain.chain[start:end]],
+                'start': start,
+                'length': length
+            })
+        
         @self.app.route('/add_peer', methods=['POST'])
         def add_peer():
             """Thêm peer mới"""
@@ -115,6 +272,11 @@ class Node:
                     'max_peers': config.MAX_PEERS
                 }), 429  # Too Many Requests
         
+        @self.app.route('/peers/health', methods=['GET'])
+        def peers_health():
+            """Trạng thái liveness của các peers (last seen, failures, RTT EWMA)"""
+            return jsonify(self.health_monitor.get_state())
+        
         @self.app.route('/remove_peer', methods=['POST'])
         def remove_peer():
             """Xóa peer"""
@@ -139,22 +301,15 @@ class Node:
         
         @self.app.route('/transaction/new', methods=['POST'])
         def new_transaction():
-            """Nhận transaction mới từ peer"""
-            data = request.get_json()
-            
+            """Nhận transaction mới từ peer (JSON hoặc nhị phân)"""
             try:
-                transaction = Transaction.from_dict(data)
-                
-                # Check if transaction already exists in pending
-                already_exists = any(
-                    tx.sender == transaction.sender and
-                    tx.receiver == transaction.receiver and
-                    tx.amount == transaction.amount and
-                    abs(tx.timestamp - transaction.timestamp) < 1
-                    for tx in self.blockchain.pending_transactions
-                )
+                if request.mimetype == codec.CONTENT_TYPE:
+                    transaction = codec.decode_transaction(request.get_data())
+                else:
+                    transaction = Transaction.from_dict(request.get_json())
                 
-                if already_exists:
+                # Check if transaction already exists in pending (O(1) theo content hash)
+                if transaction in self.blockchain.mempool:
                     print(f"⚠️ Transaction already in pending pool, skipping")
                     return jsonify({'message': 'Transaction already exists'})
                 
@@ -171,12 +326,13 @@ class Node:
         
         @self.app.route('/block/new', methods=['POST'])
         def new_block():
-            """Nhận block mới từ peer"""
-            data = request.get_json()
-            
+            """Nhận block mới từ peer (JSON hoặc nhị phân)"""
             try:
-                # Recreate block from dict
-                block = Block.from_dict(data)
+                # Recreate block from payload
+                if request.mimetype == codec.CONTENT_TYPE:
+                    block = codec.decode_block(request.get_data())
+                else:
+                    block = Block.from_dict(request.get_json())
                 
                 # Validate block
                 if block.previous_hash != self.blockchain.get_latest_block().hash:
@@ -185,19 +341,14 @@ class Node:
                 if not block.hash.startswith('0' * self.blockchain.difficulty):
                     return jsonify({'error': 'Invalid proof of work'}), 400
                 
-                # Add block to chain
-                self.blockchain.chain.append(block)
+                if not block.has_valid_merkle_root() or block.hash != block.calculate_hash():
+                    return jsonify({'error': 'Invalid block hash'}), 400
+                
+                # Add block to chain (transaction trong block bị xóa khỏi mempool)
+                self.blockchain.append_block(block)
                 
-                # Remove transaction từ pending nếu có
-                if block.transaction:
-                    # Tìm và xóa transaction tương tự trong pending
-                    self.blockchain.pending_transactions = [
-                        tx for tx in self.blockchain.pending_transactions
-                        if not (tx.sender == block.transaction.sender and
-                                tx.receiver == block.transaction.receiver and
-                                tx.amount == block.transaction.amount and
-                                abs(tx.timestamp - block.transaction.timestamp) < 1)
-                    ]
+                # Dừng mining local (block đang mine đã lỗi thời)
+                self.blockchain.cancel_mining()
                 
                 print(f"✅ Received and added block #{block.index} from peer")
                 return jsonify({'message': 'Block added successfully'})
@@ -241,8 +392,8 @@ class Node:
                 if reconstructed_chain[0].index != 0:
                     return jsonify({'error': 'Invalid genesis block'}), 400
                 
-                # Replace chain
-                self.blockchain.chain = reconstructed_chain
+                # Replace chain (balance index được rollback về điểm rẽ nhánh)
+                self.blockchain.set_chain(reconstructed_chain)
                 
                 # Clear pending transactions that are already in new chain
                 self.blockchain.pending_transactions = []
@@ -262,19 +413,16 @@ class Node:
         
         @self.app.route('/resolve', methods=['POST'])
         def resolve():
-            """Đồng bộ blockchain với peers"""
+            """Đồng bộ blockchain với peers (chỉ trả về tóm tắt, chain lấy qua /chain)"""
             replaced = self.resolve_conflicts()
+            latest = self.blockchain.get_latest_block()
             
-            if replaced:
-                return jsonify({
-                    'message': 'Chain was replaced',
-                    'new_chain': self.blockchain.to_list()
-                })
-            else:
-                return jsonify({
-                    'message': 'Chain is authoritative',
-                    'chain': self.blockchain.to_list()
-                })
+            return jsonify({
+                'message': 'Chain was replaced' if replaced else 'Chain is authoritative',
+                'replaced': replaced,
+                'length': len(self.blockchain.chain),
+                'tip': latest.hash if latest else None
+            })
         
         @self.app.route('/sync', methods=['POST'])
         def sync():
@@ -304,7 +452,8 @@ class Node:
     
     def _run_server(self):
         """Run Flask server"""
-        self.app.run(host=self.host, port=self.port, threaded=True, use_reloader=False)
+        self.app.run(host=self.host, port=self.port, threaded=True, use_reloader=False,
+                     request_handler=KeepAliveRequestHandler)
     
     def stop(self):
         """Stop node server"""
@@ -362,13 +511,29 @@ class Node:
             verbose (bool): In ra log hay không
         """
         if peer_id in self.peers:
-            del self.peers[peer_id]
+            peer_url = self.peers.pop(peer_id)
+            self.peer_client.evict(peer_url)
+            self.health_monitor.forget(peer_id)
             if verbose:
                 print(f"Peer removed: {peer_id}")
     
+    def get_executor(self):
+        """
+        Thread pool dùng chung cho các request song song đến peers
+        
+        Returns:
+            ThreadPoolExecutor: Executor (tối đa BROADCAST_WORKERS threads)
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=config.BROADCAST_WORKERS,
+                thread_name_prefix=f"peers-{self.port}"
+            )
+        return self.executor
+    
     def check_peer_health(self, peer_url, timeout=2):
         """
-        Kiểm tra peer còn hoạt động không
+        Kiểm tra peer còn hoạt động không (qua endpoint /ping nhẹ)
         
         Args:
             peer_url (str): URL của peer
@@ -378,12 +543,27 @@ class Node:
             bool: True nếu peer còn sống, False nếu chết
         """
         try:
-            import requests
-            response = requests.get(f"{peer_url}/info", timeout=timeout)
+            response = self.peer_client.get(peer_url, '/ping', timeout=timeout)
             return response.status_code == 200
         except:
             return False
     
+    def start_heartbeat(self, interval=None):
+        """
+        Bật heartbeat thread: probe peers định kỳ và tự động evict peers
+        thất bại liên tiếp PEER_MAX_FAILURES lần
+        
+        Args:
+            interval (float): Chu kỳ heartbeat (None = config.HEARTBEAT_INTERVAL)
+        """
+        if interval:
+            self.health_monitor.interval = interval
+        self.health_monitor.start()
+    
+    def stop_heartbeat(self):
+        """Tắt heartbeat thread"""
+        self.health_monitor.stop()
+    
     def cleanup_stale_peers(self, verbose=True):
         """
         Xóa tất cả peers không còn hoạt động
@@ -394,12 +574,9 @@ class Node:
         Returns:
             int: Số lượng peers đã xóa
         """
-        stale_peers = []
-        
-        # Kiểm tra từng peer
-        for peer_id, peer_url in list(self.peers.items()):
-            if not self.check_peer_health(peer_url, timeout=1):
-                stale_peers.append(peer_id)
+        # Kiểm tra tất cả peers song song
+        results = self.health_monitor.probe_all(timeout=1)
+        stale_peers = [peer_id for peer_id, alive in results.items() if not alive]
         
         # Xóa các stale peers
         for peer_id in stale_peers:
@@ -413,34 +590,80 @@ class Node:
         
         return len(stale_peers)
     
-    def broadcast_transaction(self, transaction, auto_cleanup=False):
+    def _post_to_peer(self, peer_url, path, payload, binary=None):
         """
-        Broadcast transaction đến tất cả peers
+        Gửi POST đến một peer và đo latency
         
         Args:
-            transaction (Transaction): Transaction cần broadcast
-            auto_cleanup (bool): Tự động xóa failed peers (default: False)
+            peer_url (str): URL của peer
+            path (str): Endpoint
+            payload (dict): Dữ liệu JSON
+            binary (bytes): Cùng dữ liệu dạng nhị phân, gửi thay JSON nếu peer hỗ trợ
+        
+        Returns:
+            dict: {'ok', 'status', 'latency', 'error'}
         """
-        print(f"\nBroadcasting transaction to {len(self.peers)} peers...")
+        start = time.perf_counter()
+        try:
+            if binary is not None and self.peer_client.supports_binary(peer_url):
+                response = self.peer_client.post(peer_url, path, data=binary, timeout=config.BROADCAST_TIMEOUT,
+                                                  headers={'Content-Type': codec.CONTENT_TYPE})
+            else:
+                response = self.peer_client.post(peer_url, path, json=payload, timeout=config.BROADCAST_TIMEOUT)
+            return {
+                'ok': response.status_code == 200,
+                'status': response.status_code,
+                'latency': time.perf_counter() - start,
+                'error': None
+            }
+        except Exception as e:
+            return {
+                'ok': False,
+                'status': None,
+                'latency': time.perf_counter() - start,
+                'error': str(e)
+            }
+    
+    def _broadcast(self, path, payload, label, auto_cleanup=False, binary=None):
+        """
+        Gửi payload đến tất cả peers song song (thread pool giới hạn BROADCAST_WORKERS)
         
-        failed_peers = []
+        Thời gian broadcast xấp xỉ thời gian của peer chậm nhất thay vì tổng
+        thời gian của tất cả peers.
         
-        for peer_id, peer_url in list(self.peers.items()):
-            try:
-                response = requests.post(
-                    f"{peer_url}/transaction/new",
-                    json=transaction.to_dict(),
-                    timeout=2
-                )
+        Args:
+            path (str): Endpoint (VD: '/block/new')
+            payload (dict): Dữ liệu JSON
+            label (str): Tên loại dữ liệu để log ('Transaction', 'Block')
+            auto_cleanup (bool): Tự động xóa failed peers
+            binary (bytes): Payload nhị phân cho peers hỗ trợ (None = chỉ gửi JSON)
+        
+        Returns:
+            dict: peer_id -> {'ok', 'status', 'latency', 'error'}
+        """
+        peers = list(self.peers.items())
+        results = {}
+        
+        if peers:
+            executor = self.get_executor()
+            futures = {
+                executor.submit(self._post_to_peer, peer_url, path, payload, binary): peer_id
+                for peer_id, peer_url in peers
+            }
+            
+            for future in as_completed(futures):
+                peer_id = futures[future]
+                result = future.result()
+                results[peer_id] = result
                 
-                if response.status_code == 200:
-                    print(f"✓ Transaction sent to {peer_id[:8]}...")
+                if result['ok']:
+                    print(f"✓ {label} sent to {peer_id[:8]}... ({result['latency'] * 1000:.0f} ms)")
+                elif result['error']:
+                    print(f"✗ Error sending to {peer_id[:8]}...: {result['error']}")
                 else:
-                    print(f"✗ Failed to send to {peer_id[:8]}... (HTTP {response.status_code})")
-                    failed_peers.append(peer_id)
-            except Exception as e:
-                print(f"✗ Error sending to {peer_id[:8]}...: {str(e)}")
-                failed_peers.append(peer_id)
+                    print(f"✗ Failed to send to {peer_id[:8]}... (HTTP {result['status']})")
+        
+        failed_peers = [peer_id for peer_id, result in results.items() if not result['ok']]
         
         # Auto cleanup failed peers (optional)
         if failed_peers and auto_cleanup:
@@ -448,59 +671,113 @@ class Node:
             for peer_id in failed_peers:
                 self.remove_peer(peer_id)
             print(f"✓ Remaining peers: {len(self.peers)}/{config.MAX_PEERS}")
+        
+        return results
+    
+    def broadcast_transaction(self, transaction, auto_cleanup=False):
+        """
+        Broadcast transaction đến tất cả peers (song song)
+        
+        Args:
+            transaction (Transaction): Transaction cần broadcast
+            auto_cleanup (bool): Tự động xóa failed peers (default: False)
+        
+        Returns:
+            dict: peer_id -> {'ok', 'status', 'latency', 'error'}
+        """
+        print(f"\nBroadcasting transaction to {len(self.peers)} peers...")
+        return self._broadcast('/transaction/new', transaction.to_dict(), 'Transaction', auto_cleanup,
+                               binary=self._encode_binary(codec.encode_transaction, transaction))
     
     def broadcast_block(self, block, auto_cleanup=False):
         """
-        Broadcast block đến tất cả peers
+        Broadcast block đến tất cả peers (song song)
         
         Args:
             block (Block): Block cần broadcast
             auto_cleanup (bool): Tự động xóa failed peers (default: False)
+        
+        Returns:
+            dict: peer_id -> {'ok', 'status', 'latency', 'error'}
         """
         print(f"\nBroadcasting block to {len(self.peers)} peers...")
+        return self._broadcast('/block/new', block.to_dict(), 'Block', auto_cleanup,
+                               binary=self._encode_binary(codec.encode_block, block))
+    
+    @staticmethod
+    def _encode_binary(encode, obj):
+        """Mã hóa nhị phân, None nếu tắt codec hoặc giá trị không biểu diễn được (-> gửi JSON)"""
+        if not config.BINARY_CODEC:
+            return None
+        try:
+            return encode(obj)
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _accept_header():
+        """Header Accept khi tải block: ưu tiên nhị phân, rồi NDJSON, JSON là fallback"""
+        if config.BINARY_CODEC:
+            return {'Accept': f"{codec.CONTENT_TYPE}, {NDJSON_CONTENT_TYPE};q=0.9, application/json;q=0.8"}
+        return {'Accept': f"{NDJSON_CONTENT_TYPE}, application/json;q=0.9"}
+    
+    def iter_chain(self, peer_url, start=0, end=None):
+        """
+        Stream các block [start, end) từ /chain của peer, mỗi block được yield
+        ngay khi nhận đủ (không chờ tải xong cả response)
         
-        failed_peers = []
+        Args:
+            peer_url (str): URL của peer
+            start (int): Height bắt đầu
+            end (int): Height kết thúc, không bao gồm (None = tip của peer)
         
-        for peer_id, peer_url in list(self.peers.items()):
-            try:
-                response = requests.post(
-                    f"{peer_url}/block/new",
-                    json=block.to_dict(),
-                    timeout=2
-                )
-                
-                if response.status_code == 200:
-                    print(f"✓ Block sent to {peer_id[:8]}...")
-                else:
-                    print(f"✗ Failed to send to {peer_id[:8]}... (HTTP {response.status_code})")
-                    failed_peers.append(peer_id)
-            except Exception as e:
-                print(f"✗ Error sending to {peer_id[:8]}...: {str(e)}")
-                failed_peers.append(peer_id)
+        Yields:
+            Block: Các block theo thứ tự
         
-        # Auto cleanup failed peers (optional)
-        if failed_peers and auto_cleanup:
-            print(f"\n⚠️ Removing {len(failed_peers)} unreachable peer(s)...")
-            for peer_id in failed_peers:
-                self.remove_peer(peer_id)
-            print(f"✓ Remaining peers: {len(self.peers)}/{config.MAX_PEERS}")
+        Raises:
+            ValueError: Peer trả lỗi hoặc stream bị cắt giữa chừng
+        """
+        params = {'from': start}
+        if end is not None:
+            params['to'] = end
+        
+        response = self.peer_client.get(peer_url, '/chain', params=params, headers=self._accept_header(),
+                                        stream=True, timeout=5)
+        try:
+            if response.status_code != 200:
+                raise ValueError(f"HTTP {response.status_code}")
+            
+            content_type = response.headers.get('Content-Type', '')
+            if content_type.startswith(codec.CONTENT_TYPE):
+                yield from codec.iter_decode_blocks(response.iter_content(chunk_size=config.STREAM_CHUNK_BYTES))
+            elif content_type.startswith(NDJSON_CONTENT_TYPE):
+                for line in response.iter_lines(chunk_size=config.STREAM_CHUNK_BYTES):
+                    if line:
+                        yield Block.from_dict(json.loads(line))
+            else:
+                # Peer cũ: luôn trả cả chain dạng JSON, không hỗ trợ from/to
+                chain = response.json()['chain']
+                if 'X-Chain-From' not in response.headers:
+                    chain = chain[start:end]
+                for block_data in chain:
+                    yield Block.from_dict(block_data)
+        finally:
+            response.close()
     
-    def request_chain(self, peer_url):
+    def request_chain(self, peer_url, start=0, end=None):
         """
-        Request blockchain từ peer
+        Request blockchain từ peer (stream, xem iter_chain)
         
         Args:
             peer_url (str): URL của peer
+            start (int): Height bắt đầu
+            end (int): Height kết thúc, không bao gồm (None = tip của peer)
         
         Returns:
-            list: Blockchain data hoặc None
+            list: Các Block của peer hoặc None
         """
         try:
-            response = requests.get(f"{peer_url}/chain", timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data['chain']
+            return list(self.iter_chain(peer_url, start, end))
         except Exception as e:
             print(f"Error requesting chain from {peer_url}: {str(e)}")
         
@@ -510,10 +787,12 @@ class Node:
         """
         Consensus algorithm - Thay thế chain bằng chain dài nhất từ peers
         
+        Chỉ tải tip của từng peer, sau đó đồng bộ incremental với peer có
+        chain dài nhất (xem sync_from_peer).
+        
         Returns:
             bool: True nếu chain được thay thế
         """
-        longest_chain = None
         max_length = len(self.blockchain.chain)
         
         print("\nResolving conflicts with peers...")
@@ -527,6 +806,7 @@ class Node:
                 from network.network_manager import NetworkManager
                 network_manager = NetworkManager()
                 all_nodes = network_manager.get_all_nodes()
+                network_manager.close()
                 
                 # Add network nodes as temporary peers
                 for node in all_nodes:
@@ -538,28 +818,83 @@ class Node:
             except Exception as e:
                 print(f"Failed to discover peers: {str(e)}")
         
-        # Check all peers for longer chains
-        for peer_id, peer_url in self.peers.items():
+        # Headers-first: chỉ hỏi tip (height + hash) của từng peer
+        best_peer = None
+        for peer_id, peer_url in list(self.peers.items()):
             print(f"Checking {peer_id[:8]}... ({peer_url})")
-            chain_data = self.request_chain(peer_url)
+            tip = self.request_chain_tip(peer_url)
             
-            if chain_data:
-                length = len(chain_data)
+            if tip:
+                length = tip['length']
                 print(f"  Peer chain length: {length}")
                 
                 if length > max_length:
                     max_length = length
-                    longest_chain = chain_data
+                    best_peer = peer_url
                     print(f"  ✓ Found longer chain! (length: {length})")
         
-        if longest_chain:
-            if self.blockchain.replace_chain(longest_chain):
-                print(f"\n✅ Chain replaced with longer chain! ({len(self.blockchain.chain)} blocks)")
-                return True
+        if best_peer and self.sync_from_peer(best_peer):
+            print(f"\n✅ Chain replaced with longer chain! ({len(self.blockchain.chain)} blocks)")
+            return True
         
         print("\n✅ Chain is up to date")
         return False
     
+    def request_chain_tip(self, peer_url):
+        """
+        Request tip (height, hash) của chain từ peer
+        
+        Args:
+            peer_url (str): URL của peer
+        
+        Returns:
+            dict: {'height', 'length', 'hash'} hoặc None
+        """
+        try:
+            response = self.peer_client.get(peer_url, '/chain/tip', timeout=2)
+            
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            print(f"Error requesting chain tip from {peer_url}: {str(e)}")
+        
+        return None
+    
+    def sync_from_peer(self, peer_url):
+        """
+        Đồng bộ incremental với peer: tìm điểm rẽ nhánh bằng block locator,
+        rồi chỉ tải các block còn thiếu theo từng batch
+        
+        Args:
+            peer_url (str): URL của peer
+        
+        Returns:
+            bool: True nếu chain được thay thế
+        """
+        try:
+            response = self.peer_client.post(
+                peer_url, '/chain/locate',
+                json={'locator': self.blockchain.get_locator()},
+                timeout=5
+            )
+            
+            if response.status_code != 200:
+                return False
+            
+            located = response.json()
+            fork_height = located['fork_height']
+            peer_length = located['length']
+            print(f"  Fork point: height {fork_height}, downloading {peer_length - fork_height - 1} block(s)")
+            
+            # Một request stream cho cả đoạn thiếu, block được giải mã dần khi nhận
+            blocks = list(self.iter_chain(peer_url, fork_height + 1, peer_length))
+            
+            return self.blockchain.extend_from(fork_height, blocks)
+        except Exception as e:
+            print(f"Error syncing from {peer_url}: {str(e)}")
+        
+        return False
+    
     def create_transaction(self, receiver, amount):
         """
         Tạo giao dịch mới
@@ -599,14 +934,17 @@ class Node:
         
         return transaction
     
-    def mine_block(self):
+    def mine_block(self, workers=None):
         """
         Mine block mới
         
+        Args:
+            workers (int): Số process mining (None = config.MINING_WORKERS, 0 = tất cả CPU cores)
+        
         Returns:
             Block: Block được mine (hoặc None)
         """
-        block = self.blockchain.mine_pending_transactions(self.username)
+        block = self.blockchain.mine_pending_transactions(self.username, workers=workers)
         
         if block:
             # Broadcast block đến peers
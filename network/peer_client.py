@@ -0,0 +1,135 @@
+"""
+Peer Client - HTTP client giữ kết nối keep-alive (connection pool) cho từng peer
+"""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import config
+from core.codec import CODEC_HEADER, CODEC_NAME
+
+
+class PeerClient:
+    def __init__(self, timeout=None, retries=None, pool_size=None):
+        """
+        Khởi tạo Peer Client
+        
+        Args:
+            timeout (float): Timeout mặc định mỗi request (None = config.PEER_TIMEOUT)
+            retries (int): Số lần retry khi không kết nối được (None = config.PEER_RETRIES)
+            pool_size (int): Số kết nối giữ sẵn cho mỗi peer (None = config.PEER_POOL_SIZE)
+        """
+        self.timeout = timeout if timeout is not None else config.PEER_TIMEOUT
+        self.retries = retries if retries is not None else config.PEER_RETRIES
+        self.pool_size = pool_size or config.PEER_POOL_SIZE
+        
+        # peer_url -> requests.Session (giữ kết nối TCP giữa các request)
+        self._sessions = {}
+        self._lock = threading.Lock()
+        
+        # Peers đã báo (qua header CODEC_HEADER) là hiểu payload nhị phân
+        self._binary_peers = set()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    def _create_session(self):
+        """Tạo session với connection pool và retry cho lỗi kết nối"""
+        session = requests.Session()
+        
+        # Chỉ retry lỗi kết nối (request chưa được gửi đi), không retry read/status
+        retry = Retry(total=self.retries, connect=self.retries, read=0, status=0,
+                      redirect=0, backoff_factor=0.1)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def session(self, peer_url):
+        """
+        Lấy session của peer (tạo mới nếu chưa có)
+        
+        Args:
+            peer_url (str): URL của peer
+        
+        Returns:
+            requests.Session: Session dùng chung cho peer
+        """
+        with self._lock:
+            session = self._sessions.get(peer_url)
+            
+            if session is None:
+                self.stats['misses'] += 1
+                session = self._create_session()
+                self._sessions[peer_url] = session
+            else:
+                self.stats['hits'] += 1
+            
+            return session
+    
+    def _record_codec(self, peer_url, response):
+        """Ghi nhận peer hỗ trợ payload nhị phân từ header của response"""
+        if response.headers.get(CODEC_HEADER) == CODEC_NAME:
+            self._binary_peers.add(peer_url)
+        else:
+            self._binary_peers.discard(peer_url)
+        return response
+    
+    def supports_binary(self, peer_url):
+        """
+        Peer có nhận/gửi được payload nhị phân không (biết sau response đầu tiên)
+        
+        Args:
+            peer_url (str): URL của peer
+        
+        Returns:
+            bool: True nếu peer đã báo hỗ trợ
+        """
+        return peer_url in self._binary_peers
+    
+    def get(self, peer_url, path, timeout=None, **kwargs):
+        """GET {peer_url}{path} qua session của peer"""
+        timeout = timeout if timeout is not None else self.timeout
+        response = self.session(peer_url).get(f"{peer_url}{path}", timeout=timeout, **kwargs)
+        return self._record_codec(peer_url, response)
+    
+    def post(self, peer_url, path, timeout=None, **kwargs):
+        """POST {peer_url}{path} qua session của peer"""
+        timeout = timeout if timeout is not None else self.timeout
+        response = self.session(peer_url).post(f"{peer_url}{path}", timeout=timeout, **kwargs)
+        return self._record_codec(peer_url, response)
+    
+    def evict(self, peer_url):
+        """
+        Đóng và xóa session của peer (VD: khi peer bị remove)
+        
+        Args:
+            peer_url (str): URL của peer
+        """
+        with self._lock:
+            session = self._sessions.pop(peer_url, None)
+            self._binary_peers.discard(peer_url)
+            if session is not None:
+                self.stats['evictions'] += 1
+        
+        if session is not None:
+            session.close()
+    
+    def close(self):
+        """Đóng tất cả sessions"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._binary_peers.clear()
+        
+        for session in sessions:
+            session.close()
+    
+    def get_stats(self):
+        """
+        Thống kê connection pool
+        
+        Returns:
+            dict: {'hits', 'misses', 'evictions', 'open_sessions', 'binary_peers'}
+        """
+        with self._lock:
+            return dict(self.stats, open_sessions=len(self._sessions),
+                        binary_peers=len(self._binary_peers))
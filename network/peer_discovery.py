@@ -2,7 +2,6 @@
 Peer Discovery - Tìm kiếm và kết nối với các peers
 """
 import random
-import requests
 import config
 
 
@@ -76,7 +75,7 @@ class PeerDiscovery:
         
         try:
             # Ping peer để kiểm tra kết nối
-            response = requests.get(f"{peer_url}/ping", timeout=2)
+            response = self.node.peer_client.get(peer_url, '/ping', timeout=2)
             
             if response.status_code == 200:
                 # Thêm peer vào danh sách
@@ -85,8 +84,8 @@ class PeerDiscovery:
                 
                 # Thông báo cho peer về kết nối (optional)
                 try:
-                    requests.post(
-                        f"{peer_url}/add_peer",
+                    self.node.peer_client.post(
+                        peer_url, '/add_peer',
                         json={
                             'peer_id': self.node.node_id,
                             'peer_url': self.node.get_url()
@@ -114,8 +113,8 @@ class PeerDiscovery:
             
             try:
                 # Thông báo cho peer về việc ngắt kết nối
-                requests.post(
-                    f"{peer_url}/remove_peer",
+                self.node.peer_client.post(
+                    peer_url, '/remove_peer',
                     json={'peer_id': self.node.node_id},
                     timeout=2
                 )
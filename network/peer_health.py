@@ -0,0 +1,167 @@
+"""
+Peer Health Monitor - Kiểm tra song song trạng thái sống/chết của các peers
+"""
+import time
+import threading
+from concurrent.futures import as_completed
+import config
+
+
+# Hệ số làm mượt cho RTT EWMA (trọng số của mẫu mới)
+RTT_EWMA_ALPHA = 0.3
+
+
+class PeerHealth:
+    def __init__(self):
+        """Trạng thái liveness của một peer"""
+        self.last_seen = None  # Thời điểm (time.time()) peer phản hồi gần nhất
+        self.consecutive_failures = 0
+        self.rtt_ewma = None  # seconds
+    
+    def record_success(self, rtt):
+        """Ghi nhận một lần probe thành công"""
+        self.last_seen = time.time()
+        self.consecutive_failures = 0
+        if self.rtt_ewma is None:
+            self.rtt_ewma = rtt
+        else:
+            self.rtt_ewma = RTT_EWMA_ALPHA * rtt + (1 - RTT_EWMA_ALPHA) * self.rtt_ewma
+    
+    def record_failure(self):
+        """Ghi nhận một lần probe thất bại"""
+        self.consecutive_failures += 1
+    
+    def to_dict(self):
+        """Chuyển trạng thái thành dictionary"""
+        return {
+            'last_seen': self.last_seen,
+            'consecutive_failures': self.consecutive_failures,
+            'rtt_ewma_ms': round(self.rtt_ewma * 1000, 3) if self.rtt_ewma is not None else None
+        }
+
+
+class PeerHealthMonitor:
+    def __init__(self, node, interval=None, max_failures=None, timeout=None):
+        """
+        Khởi tạo Peer Health Monitor
+        
+        Args:
+            node (Node): Node sở hữu danh sách peers
+            interval (float): Chu kỳ heartbeat (None = config.HEARTBEAT_INTERVAL)
+            max_failures (int): Số lần thất bại liên tiếp trước khi evict (None = config.PEER_MAX_FAILURES)
+            timeout (float): Timeout mỗi probe (None = config.PEER_PROBE_TIMEOUT)
+        """
+        self.node = node
+        self.interval = interval or config.HEARTBEAT_INTERVAL
+        self.max_failures = max_failures or config.PEER_MAX_FAILURES
+        self.timeout = timeout or config.PEER_PROBE_TIMEOUT
+        
+        # peer_id -> PeerHealth
+        self.health = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def _get_health(self, peer_id):
+        with self._lock:
+            return self.health.setdefault(peer_id, PeerHealth())
+    
+    def probe(self, peer_id, peer_url, timeout=None):
+        """
+        Ping một peer (endpoint /ping nhẹ) và cập nhật trạng thái
+        
+        Args:
+            peer_id (str): ID của peer
+            peer_url (str): URL của peer
+            timeout (float): Timeout (None = self.timeout)
+        
+        Returns:
+            bool: True nếu peer còn sống
+        """
+        health = self._get_health(peer_id)
+        start = time.perf_counter()
+        
+        try:
+            response = self.node.peer_client.get(peer_url, '/ping', timeout=timeout or self.timeout)
+            alive = response.status_code == 200
+        except Exception:
+            alive = False
+        
+        if alive:
+            health.record_success(time.perf_counter() - start)
+        else:
+            health.record_failure()
+        return alive
+    
+    def probe_all(self, timeout=None):
+        """
+        Probe tất cả peers cùng lúc
+        
+        Args:
+            timeout (float): Timeout mỗi probe (None = self.timeout)
+        
+        Returns:
+            dict: peer_id -> bool (True nếu còn sống)
+        """
+        peers = list(self.node.peers.items())
+        if not peers:
+            return {}
+        
+        executor = self.node.get_executor()
+        futures = {
+            executor.submit(self.probe, peer_id, peer_url, timeout): peer_id
+            for peer_id, peer_url in peers
+        }
+        return {futures[future]: future.result() for future in as_completed(futures)}
+    
+    def stale_peers(self):
+        """
+        Danh sách peers thất bại liên tiếp >= max_failures
+        
+        Returns:
+            list: Danh sách peer_id
+        """
+        with self._lock:
+            return [
+                peer_id for peer_id, health in self.health.items()
+                if health.consecutive_failures >= self.max_failures and peer_id in self.node.peers
+            ]
+    
+    def forget(self, peer_id):
+        """Xóa trạng thái của peer (khi peer bị remove)"""
+        with self._lock:
+            self.health.pop(peer_id, None)
+    
+    def get_state(self):
+        """
+        Trạng thái liveness của tất cả peers
+        
+        Returns:
+            dict: peer_id -> {'last_seen', 'consecutive_failures', 'rtt_ewma_ms'}
+        """
+        with self._lock:
+            return {peer_id: health.to_dict() for peer_id, health in self.health.items()}
+    
+    def start(self):
+        """Chạy heartbeat thread: probe định kỳ và evict peers chết liên tục"""
+        if self._thread and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Dừng heartbeat thread"""
+        self._stop_event.set()
+    
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.probe_all()
+                for peer_id in self.stale_peers():
+                    print(f"⚠️ Heartbeat: removing stale peer {peer_id[:8]}... "
+                          f"({self.max_failures} consecutive failures)")
+                    self.node.remove_peer(peer_id, verbose=False)
+            except Exception as e:
+                print(f"❌ Heartbeat error: {str(e)}")
@@ -0,0 +1,518 @@
+"""
+Node Registry - Backend lưu danh sách nodes của mạng (JSON file hoặc SQLite)
+"""
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_file(f):
+    """Khóa độc quyền file (chờ đến khi lấy được khóa)"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue  # LK_LOCK chỉ thử 10 lần rồi báo lỗi -> thử lại
+
+
+def _unlock_file(f):
+    """Mở khóa file đã khóa bằng _lock_file"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def make_node_info(node_id, host, port, username, is_active=True):
+    """
+    Tạo bản ghi node theo định dạng chung của registry
+    
+    Returns:
+        dict: {'node_id', 'host', 'port', 'username', 'url', 'is_active'}
+    """
+    return {
+        'node_id': node_id,
+        'host': host,
+        'port': port,
+        'username': username,
+        'url': f"http://{host}:{port}",
+        'is_active': is_active
+    }
+
+
+class JsonRegistry:
+    def __init__(self, path):
+        """
+        Registry lưu trong một file JSON (định dạng network_nodes.txt)
+        
+        Args:
+            path (str): Đường dẫn file registry
+        """
+        self.path = path
+        
+        # Chữ ký (mtime, size, inode) của file lúc load gần nhất
+        self._file_signature = None
+        self.nodes = {}
+        
+        # Ghi registry: khóa trong process (RLock) + khóa giữa các process (file .lock)
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._dirty = False
+        self.refresh()
+    
+    def _get_file_signature(self):
+        """
+        Lấy chữ ký của file registry để phát hiện thay đổi
+        
+        Returns:
+            tuple: (mtime_ns, size, inode) hoặc None nếu file không tồn tại
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+    
+    def refresh(self):
+        """
+        Đồng bộ cache với file: chỉ đọc lại file khi mtime/size/inode thay đổi
+        
+        Returns:
+            dict: Danh sách nodes (cache)
+        """
+        signature = self._get_file_signature()
+        
+        if signature is None or signature != self._file_signature:
+            self.nodes = self.load_network()
+            self._file_signature = signature
+        
+        return self.nodes
+    
+    def load_network(self):
+        """
+        Load danh sách nodes từ file
+        
+        Returns:
+            dict: Dictionary với key là node_id, value là node info
+        """
+        if not os.path.exists(self.path):
+            return {}
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+    
+    def save_network(self):
+        """
+        Lưu danh sách nodes vào file (atomic: ghi file tạm rồi rename).
+        
+        Process khác đọc file cùng lúc chỉ thấy bản cũ hoặc bản mới đầy đủ,
+        không bao giờ thấy file ghi dở.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.network-', suffix='.tmp', dir=directory)
+        
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.nodes, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        # File vừa ghi chính là nội dung cache -> không cần đọc lại
+        self._file_signature = self._get_file_signature()
+    
+    @contextmanager
+    def batch(self):
+        """
+        Gom nhiều thay đổi registry thành một lần ghi.
+        
+        Giữ khóa file trong suốt batch (process khác không chen vào giữa
+        read-modify-write), đồng bộ cache một lần ở đầu và ghi file một lần
+        ở cuối nếu có thay đổi. Batch lồng nhau chỉ ghi ở batch ngoài cùng.
+        Nếu có exception, các thay đổi chưa ghi bị bỏ (cache load lại từ file).
+        """
+        with self._lock:
+            lock_handle = None
+            if self._batch_depth == 0:
+                lock_handle = open(self.path + '.lock', 'a+')
+                _lock_file(lock_handle)
+                self.refresh()
+            
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                if self._batch_depth == 1:
+                    self._dirty = False
+                    self._file_signature = None
+                raise
+            finally:
+                self._batch_depth -= 1
+                
+                if lock_handle is not None:
+                    try:
+                        if self._dirty:
+                            self.save_network()
+                    finally:
+                        self._dirty = False
+                        _unlock_file(lock_handle)
+                        lock_handle.close()
+    
+    def add_node(self, node_info):
+        """
+        Thêm/cập nhật node, xóa nodes cũ trùng username hoặc port
+        
+        Args:
+            node_info (dict): Bản ghi node (make_node_info)
+        
+        Returns:
+            list: [(node_id, 'username' | 'port')] các nodes trùng đã bị xóa
+        """
+        with self.batch():
+            node_id = node_info['node_id']
+            removed = []
+            
+            for existing_id, existing_node in self.nodes.items():
+                if existing_id == node_id:
+                    continue
+                if existing_node['username'] == node_info['username']:
+                    removed.append((existing_id, 'username'))
+                elif existing_node['port'] == node_info['port']:
+                    removed.append((existing_id, 'port'))
+            
+            for old_id, _ in removed:
+                del self.nodes[old_id]
+            
+            self.nodes[node_id] = dict(node_info)
+            self._dirty = True
+            return removed
+    
+    def remove_node(self, node_id):
+        """
+        Xóa node
+        
+        Returns:
+            bool: True nếu node tồn tại và đã bị xóa
+        """
+        with self.batch():
+            if node_id not in self.nodes:
+                return False
+            del self.nodes[node_id]
+            self._dirty = True
+            return True
+    
+    def set_active(self, node_id, is_active):
+        """Đánh dấu node active/inactive"""
+        with self.batch():
+            if node_id in self.nodes:
+                self.nodes[node_id]['is_active'] = is_active
+                self._dirty = True
+    
+    def get_node(self, node_id):
+        """Thông tin một node (None nếu không có)"""
+        return self.refresh().get(node_id)
+    
+    def get_all_nodes(self):
+        """Danh sách tất cả nodes"""
+        return list(self.refresh().values())
+    
+    def get_active_nodes(self):
+        """Danh sách nodes đang hoạt động"""
+        return [node for node in self.refresh().values() if node.get('is_active', True)]
+    
+    def sample_active_nodes(self, count, exclude_ids=()):
+        """Lấy ngẫu nhiên tối đa `count` nodes active không nằm trong exclude_ids"""
+        exclude_ids = set(exclude_ids)
+        available_nodes = [
+            node for node in self.get_active_nodes()
+            if node['node_id'] not in exclude_ids
+        ]
+        return random.sample(available_nodes, min(count, len(available_nodes)))
+    
+    def count(self):
+        """Số lượng nodes"""
+        return len(self.refresh())
+    
+    def close(self):
+        """JSON registry không giữ tài nguyên mở"""
+        pass
+
+
+class SqliteRegistry:
+    # Số lần bốc thăm rowid tối đa (nhân với count) trước khi fallback ORDER BY RANDOM()
+    SAMPLE_ATTEMPTS_FACTOR = 8
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS nodes (
+            rid INTEGER PRIMARY KEY,
+            node_id TEXT NOT NULL UNIQUE,
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            url TEXT NOT NULL,
+            is_active INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE INDEX IF NOT EXISTS idx_nodes_username ON nodes(username);
+        CREATE INDEX IF NOT EXISTS idx_nodes_port ON nodes(port);
+        CREATE INDEX IF NOT EXISTS idx_nodes_active ON nodes(is_active);
+    """
+    
+    def __init__(self, path):
+        """
+        Registry lưu trong SQLite (WAL mode), dùng được cho hàng trăm nghìn nodes
+        
+        Args:
+            path (str): Đường dẫn file database
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        
+        # Autocommit (isolation_level=None), transaction được mở tường minh trong batch()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+    
+    @staticmethod
+    def _row_to_node(row):
+        """Chuyển row SQLite thành bản ghi node"""
+        return make_node_info(row['node_id'], row['host'], row['port'], row['username'],
+                              bool(row['is_active']))
+    
+    @contextmanager
+    def batch(self):
+        """
+        Gom nhiều thay đổi vào một transaction (BEGIN IMMEDIATE ... COMMIT).
+        Batch lồng nhau dùng chung transaction ngoài cùng; exception -> ROLLBACK.
+        """
+        with self._lock:
+            outermost = self._batch_depth == 0
+            if outermost:
+                self._conn.execute("BEGIN IMMEDIATE")
+            
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                if outermost:
+                    self._conn.execute("ROLLBACK")
+                raise
+            else:
+                if outermost:
+                    self._conn.execute("COMMIT")
+            finally:
+                self._batch_depth -= 1
+    
+    def add_node(self, node_info):
+        """
+        Thêm/cập nhật node, xóa nodes cũ trùng username hoặc port (qua index)
+        
+        Args:
+            node_info (dict): Bản ghi node (make_node_info)
+        
+        Returns:
+            list: [(node_id, 'username' | 'port')] các nodes trùng đã bị xóa
+        """
+        with self.batch():
+            rows = self._conn.execute(
+                "SELECT node_id, username FROM nodes WHERE node_id != ? AND username = ? "
+                "UNION SELECT node_id, username FROM nodes WHERE node_id != ? AND port = ?",
+                (node_info['node_id'], node_info['username'], node_info['node_id'], node_info['port'])
+            ).fetchall()
+            removed = [
+                (row['node_id'], 'username' if row['username'] == node_info['username'] else 'port')
+                for row in rows
+            ]
+            
+            self._conn.executemany("DELETE FROM nodes WHERE node_id = ?", [(node_id,) for node_id, _ in removed])
+            self._conn.execute(
+                "INSERT INTO nodes (node_id, host, port, username, url, is_active) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(node_id) DO UPDATE SET host = excluded.host, port = excluded.port, "
+                "username = excluded.username, url = excluded.url, is_active = excluded.is_active",
+                (node_info['node_id'], node_info['host'], node_info['port'], node_info['username'],
+                 node_info['url'], int(node_info.get('is_active', True)))
+            )
+            return removed
+    
+    def remove_node(self, node_id):
+        """
+        Xóa node
+        
+        Returns:
+            bool: True nếu node tồn tại và đã bị xóa
+        """
+        with self.batch():
+            return self._conn.execute("DELETE FROM nodes WHERE node_id = ?", (node_id,)).rowcount > 0
+    
+    def set_active(self, node_id, is_active):
+        """Đánh dấu node active/inactive"""
+        with self.batch():
+            self._conn.execute("UPDATE nodes SET is_active = ? WHERE node_id = ?", (int(is_active), node_id))
+    
+    def get_node(self, node_id):
+        """Thông tin một node (None nếu không có)"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM nodes WHERE node_id = ?", (node_id,)).fetchone()
+        return self._row_to_node(row) if row else None
+    
+    def get_all_nodes(self):
+        """Danh sách tất cả nodes"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM nodes ORDER BY rid").fetchall()
+        return [self._row_to_node(row) for row in rows]
+    
+    def get_active_nodes(self):
+        """Danh sách nodes đang hoạt động"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM nodes WHERE is_active = 1 ORDER BY rid").fetchall()
+        return [self._row_to_node(row) for row in rows]
+    
+    def sample_active_nodes(self, count, exclude_ids=()):
+        """
+        Lấy ngẫu nhiên tối đa `count` nodes active không nằm trong exclude_ids.
+        
+        Bốc thăm rowid ngẫu nhiên trong [min, max] và tra theo primary key
+        (rejection sampling: rowid trống, inactive hoặc bị loại thì bốc lại),
+        nên mỗi node active có xác suất như nhau và không phải quét cả bảng.
+        Nếu bốc thăm không đủ (mạng nhỏ / loại gần hết) thì fallback
+        ORDER BY RANDOM() trên tập còn lại.
+        
+        Args:
+            count (int): Số nodes cần lấy
+            exclude_ids (iterable): node_id không muốn lấy
+        
+        Returns:
+            list: Danh sách nodes ngẫu nhiên
+        """
+        exclude_ids = set(exclude_ids)
+        if count <= 0:
+            return []
+        
+        with self._lock:
+            # MIN và MAX tách riêng để SQLite dùng B-tree lookup thay vì quét bảng
+            low = self._conn.execute("SELECT MIN(rid) FROM nodes").fetchone()[0]
+            high = self._conn.execute("SELECT MAX(rid) FROM nodes").fetchone()[0]
+            if low is None:
+                return []
+            
+            chosen = {}
+            attempts = count * self.SAMPLE_ATTEMPTS_FACTOR
+            while len(chosen) < count and attempts > 0:
+                attempts -= 1
+                row = self._conn.execute(
+                    "SELECT * FROM nodes WHERE rid = ? AND is_active = 1", (random.randint(low, high),)
+                ).fetchone()
+                if row is not None and row['node_id'] not in exclude_ids and row['node_id'] not in chosen:
+                    chosen[row['node_id']] = self._row_to_node(row)
+            
+            if len(chosen) < count:
+                skip = exclude_ids | set(chosen)
+                rows = self._conn.execute("SELECT * FROM nodes WHERE is_active = 1 ORDER BY RANDOM()")
+                for row in rows:
+                    if row['node_id'] not in skip:
+                        chosen[row['node_id']] = self._row_to_node(row)
+                        if len(chosen) == count:
+                            break
+        
+        return list(chosen.values())
+    
+    def count(self):
+        """Số lượng nodes"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+    
+    def import_nodes(self, nodes):
+        """
+        Nạp nhiều nodes trong một transaction (dùng cho migration)
+        
+        Args:
+            nodes (iterable): Bản ghi node (dict)
+        
+        Returns:
+            int: Số nodes đã nạp
+        """
+        imported = 0
+        with self.batch():
+            for node in nodes:
+                self.add_node(make_node_info(node['node_id'], node['host'], node['port'],
+                                             node['username'], node.get('is_active', True)))
+                imported += 1
+        return imported
+    
+    def close(self):
+        """Đóng kết nối database"""
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_json_registry(json_path, sqlite_path):
+    """
+    Chuyển registry từ file JSON (network_nodes.txt) sang SQLite
+    
+    Args:
+        json_path (str): File JSON nguồn
+        sqlite_path (str): File database đích
+    
+    Returns:
+        int: Số nodes đã chuyển
+    """
+    nodes = JsonRegistry(json_path).get_all_nodes()
+    registry = SqliteRegistry(sqlite_path)
+    try:
+        return registry.import_nodes(nodes)
+    finally:
+        registry.close()
+
+
+def create_registry(backend=None, path=None):
+    """
+    Tạo registry backend theo cấu hình
+    
+    Args:
+        backend (str): 'json' hoặc 'sqlite' (None = config.NETWORK_BACKEND)
+        path (str): File registry (None = config.NETWORK_FILE / config.NETWORK_DB_FILE)
+    
+    Returns:
+        JsonRegistry | SqliteRegistry: Registry backend
+    """
+    backend = backend or config.NETWORK_BACKEND
+    
+    if backend == 'json':
+        return JsonRegistry(path or config.NETWORK_FILE)
+    
+    if backend == 'sqlite':
+        path = path or config.NETWORK_DB_FILE
+        
+        # Lần đầu dùng SQLite: tự động chuyển registry JSON cũ (nếu có)
+        if not os.path.exists(path) and os.path.exists(config.NETWORK_FILE):
+            count = migrate_json_registry(config.NETWORK_FILE, path)
+            print(f"📦 Migrated {count} nodes from {config.NETWORK_FILE} to {path}")
+        
+        return SqliteRegistry(path)
+    
+    raise ValueError(f"Unknown network backend: {backend}")
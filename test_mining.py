@@ -0,0 +1,157 @@
+"""
+Test Mining - Parallel mining phải cho kết quả giống single-thread
+"""
+import threading
+from core.block import Block, share_block
+from core.transaction import Transaction
+from core.blockchain import Blockchain
+from core.mining import HeaderHasher
+
+
+def make_block():
+    """Tạo block cố định (timestamp cố định để hash có thể so sánh)"""
+    tx = Transaction(sender="Alice", receiver="Bob", amount=5, timestamp=1700000000.0)
+    return Block(index=1, transaction=tx, previous_hash="00abc", timestamp=1700000001.0, miner="Alice")
+
+
+def test_parallel_matches_single_thread():
+    """Test 1: Parallel miner tìm đúng nonce nhỏ nhất như single-thread"""
+    print("\n" + "="*80)
+    print("TEST 1: Parallel Mining Matches Single-Thread")
+    print("="*80)
+    
+    single = make_block()
+    single.mine_block(3, workers=1)
+    
+    parallel = make_block()
+    parallel.mine_block(3, workers=4)
+    
+    print(f"✅ Single:   nonce={single.nonce} hash={single.hash}")
+    print(f"✅ Parallel: nonce={parallel.nonce} hash={parallel.hash}")
+    
+    assert parallel.nonce == single.nonce, f"Nonce mismatch: {parallel.nonce} vs {single.nonce}"
+    assert parallel.hash == single.hash, "Hash mismatch"
+    assert parallel.hash == parallel.calculate_hash()
+    
+    print("\n✅ TEST 1 PASSED!\n")
+
+
+def test_header_hasher_matches_calculate_hash():
+    """Test 2: Midstate fast path cho hash giống hệt Block.calculate_hash"""
+    print("="*80)
+    print("TEST 2: Header Hasher Compatibility")
+    print("="*80)
+    
+    block = make_block()
+    block.miner = 'Eve "nonce": "__NONCE__"'  # Chuỗi cố tình giống marker
+    hasher = HeaderHasher(block.header_dict())
+    
+    for nonce in [0, 1, 9, 10, 12345, 10**12]:
+        block.nonce = nonce
+        assert hasher.hash(nonce) == block.calculate_hash(), f"Hash mismatch at nonce {nonce}"
+    print("✅ Hashes identical for all sampled nonces")
+    
+    print("\n✅ TEST 2 PASSED!\n")
+
+
+def test_mining_cancel():
+    """Test 3: Cancel mining trả transaction về pending pool"""
+    print("="*80)
+    print("TEST 3: Mining Cancel")
+    print("="*80)
+    
+    blockchain = Blockchain(owner_address="Alice")
+    blockchain.difficulty = 64  # Không thể mine xong
+    blockchain.add_transaction(Transaction(sender="Alice", receiver="Bob", amount=10))
+    
+    threading.Timer(0.2, blockchain.cancel_mining).start()
+    block = blockchain.mine_pending_transactions("Alice")
+    
+    assert block is None, "Cancelled mining should return None"
+    assert len(blockchain.chain) == 1, "No block should be appended"
+    assert len(blockchain.pending_transactions) == 1, "Transaction should be back in pool"
+    print("✅ Mining cancelled, transaction returned to pool")
+    
+    print("\n✅ TEST 3 PASSED!\n")
+
+
+def test_batch_block_merkle_root():
+    """Test 4: Block nhiều giao dịch commit vào Merkle root"""
+    print("="*80)
+    print("TEST 4: Batch Block Merkle Root")
+    print("="*80)
+    
+    blockchain = Blockchain(owner_address="Alice")
+    for receiver in ["Bob", "Charlie", "Dave"]:
+        blockchain.add_transaction(Transaction(sender="Alice", receiver=receiver, amount=10))
+    
+    block = blockchain.mine_pending_transactions("Miner")
+    assert len(block.transactions) == 3, "All pending transactions should fit in one block"
+    assert blockchain.get_balance("Alice") == 70
+    assert blockchain.is_chain_valid()
+    print(f"✅ Mined 3 transactions in block #{block.index} (merkle {block.merkle_root[:16]}...)")
+    
+    # Round-trip qua dict giữ nguyên hash
+    restored = Blockchain.from_list(blockchain.to_list())
+    assert restored.chain[-1].hash == block.hash
+    assert restored.is_chain_valid()
+    print("✅ Block survives to_dict/from_dict round-trip")
+    
+    # Sửa giao dịch -> Merkle root không còn khớp
+    block.transactions[1].amount = 1000
+    assert not blockchain.is_chain_valid(full=True), "Tampered transaction must invalidate chain"
+    print("✅ Tampered transaction detected via Merkle root")
+    
+    # Block định dạng cũ (1 giao dịch) vẫn đọc được
+    legacy = make_block()
+    legacy.mine_block(2)
+    loaded = Block.from_dict(legacy.to_dict())
+    assert not loaded.is_batch and loaded.hash == loaded.calculate_hash()
+    print("✅ Legacy single-transaction block still validates")
+    
+    print("\n✅ TEST 4 PASSED!\n")
+
+
+def test_compact_shared_blocks():
+    """Test 5: Block/Transaction dùng __slots__, hash lưu bytes, block đã verify được dùng chung"""
+    print("\n" + "="*80)
+    print("TEST 5: Compact & Shared Blocks")
+    print("="*80)
+    
+    block = make_block()
+    block.mine_block(2)
+    assert not hasattr(block, '__dict__') and not hasattr(block.transaction, '__dict__')
+    assert isinstance(block.hash_bytes, bytes) and len(block.hash_bytes) == 32
+    assert Block.from_dict(block.to_dict()).to_dict() == block.to_dict()
+    print(f"✅ Slotted objects, 32-byte hash, hex at the API: {block.hash[:16]}...")
+    
+    # Hai node giải mã cùng một chain -> dùng chung Block object
+    source = Blockchain(owner_address="Alice")
+    source.difficulty = 2
+    source.add_transaction(Transaction(sender="Alice", receiver="Bob", amount=10))
+    source.mine_pending_transactions("Miner")
+    
+    node_a, node_b = Blockchain(owner_address="A"), Blockchain(owner_address="B")
+    node_a.set_chain([Block.from_dict(data) for data in source.to_list()])
+    node_b.set_chain([Block.from_dict(data) for data in source.to_list()])
+    assert all(a is b for a, b in zip(node_a.chain, node_b.chain))
+    print(f"✅ {len(node_a.chain)} blocks shared between two chains")
+    
+    # Block giả mạo (hash không khớp nội dung) không được share
+    forged_data = source.chain[-1].to_dict()
+    forged_data['transactions'][0]['amount'] = 1000
+    forged = Block.from_dict(forged_data)
+    assert share_block(forged) is forged
+    assert share_block(Block.from_dict(source.chain[-1].to_dict())) is node_a.chain[-1]
+    assert node_a.chain[-1].transactions[0].amount == 10
+    print("✅ Forged block kept private, shared copy untouched")
+    
+    print("\n✅ TEST 5 PASSED!\n")
+
+
+if __name__ == "__main__":
+    test_parallel_matches_single_thread()
+    test_header_hasher_matches_calculate_hash()
+    test_mining_cancel()
+    test_batch_block_merkle_root()
+    test_compact_shared_blocks()
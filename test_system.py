@@ -1,12 +1,16 @@
 """
 Quick test script để verify hệ thống hoạt động
 """
+import os
 import sys
 import time
+import tempfile
+import multiprocessing
 from core.blockchain import Blockchain
 from core.transaction import Transaction
 from network.node import Node
 from network.network_manager import NetworkManager
+from network.registry import migrate_json_registry
 from auth.user_manager import UserManager
 
 
@@ -178,6 +182,388 @@ def test_mining():
     print("✅ TEST 5 PASSED\n")
 
 
+def _register_worker(network_file, worker_id, count):
+    """Process con: đăng ký `count` nodes vào registry dùng chung"""
+    manager = NetworkManager(network_file)
+    for i in range(count):
+        manager.register_node(f"w{worker_id}-{i}", "127.0.0.1", 10000 + worker_id * 1000 + i, f"W{worker_id}_{i}")
+
+
+def test_registry_batch():
+    """Test registry: batch ghi một lần, ghi đồng thời không mất dữ liệu"""
+    print("\n" + "="*80)
+    print("TEST 6: NETWORK REGISTRY BATCH & LOCKING")
+    print("="*80)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        network_file = os.path.join(tmp, 'network_nodes.txt')
+        manager = NetworkManager(network_file)
+        
+        # Batch 200 nodes -> chỉ một lần ghi file
+        writes = []
+        original_save = manager.registry.save_network
+        manager.registry.save_network = lambda: (writes.append(1), original_save())
+        
+        manager.register_many([
+            {'node_id': f"n{i}", 'host': '127.0.0.1', 'port': 9000 + i, 'username': f"U{i}"}
+            for i in range(200)
+        ])
+        assert len(writes) == 1, f"Expected 1 write, got {len(writes)}"
+        assert NetworkManager(network_file).get_network_size() == 200
+        
+        manager.unregister_many([f"n{i}" for i in range(100)])
+        assert len(writes) == 2, "unregister_many should write once"
+        assert NetworkManager(network_file).get_network_size() == 100
+        print(f"✓ register_many/unregister_many: 1 write per batch")
+        
+        # Trùng username/port được xử lý trong cùng một lần ghi
+        manager.register_node("n-new", "127.0.0.1", 9150, "U199")
+        assert len(writes) == 3
+        assert manager.get_node("n150") is None and manager.get_node("n199") is None
+        print(f"✓ Duplicate username/port replaced with a single write")
+        
+        # Nhiều process ghi đồng thời -> không mất node nào
+        os.remove(network_file)
+        workers = [
+            multiprocessing.Process(target=_register_worker, args=(network_file, w, 25))
+            for w in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        assert NetworkManager(network_file).get_network_size() == 100, "Concurrent writes lost nodes"
+        print(f"✓ 4 concurrent processes x 25 nodes -> 100 nodes registered")
+    
+    print("✅ TEST 6 PASSED\n")
+
+
+def test_registry_sqlite():
+    """Test SQLite registry: cùng hành vi với JSON, migration, random sampling"""
+    print("\n" + "="*80)
+    print("TEST 7: SQLITE NETWORK REGISTRY")
+    print("="*80)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file = os.path.join(tmp, 'network_nodes.txt')
+        db_file = os.path.join(tmp, 'network_nodes.db')
+        
+        # Registry JSON cũ -> migrate sang SQLite
+        NetworkManager(json_file, backend='json').register_many([
+            {'node_id': f"n{i}", 'host': '127.0.0.1', 'port': 9000 + i, 'username': f"U{i}"}
+            for i in range(50)
+        ])
+        assert migrate_json_registry(json_file, db_file) == 50
+        
+        manager = NetworkManager(db_file, backend='sqlite')
+        assert manager.get_network_size() == 50
+        assert manager.get_node("n7")['url'] == "http://127.0.0.1:9007"
+        print(f"✓ Migrated 50 nodes from JSON")
+        
+        # Trùng username/port thay thế node cũ (tra qua index)
+        manager.register_node("n-new", "127.0.0.1", 9010, "U20")
+        assert manager.get_node("n10") is None and manager.get_node("n20") is None
+        assert manager.get_network_size() == 49
+        print(f"✓ Duplicate username/port replaced")
+        
+        # Random sampling: đúng số lượng, không trùng, tôn trọng exclude và is_active
+        manager.mark_node_inactive("n0")
+        excluded = [f"n{i}" for i in range(1, 40)]
+        for _ in range(20):
+            sample = manager.get_random_nodes(5, exclude_ids=excluded)
+            ids = [node['node_id'] for node in sample]
+            assert len(ids) == len(set(ids)) == 5
+            assert not set(ids) & set(excluded) and "n0" not in ids
+        
+        remaining = manager.get_random_nodes(100, exclude_ids=excluded)
+        assert len(remaining) == 11  # n40..n49 + n-new (n0 inactive)
+        print(f"✓ Random sampling respects exclude_ids and is_active")
+        
+        manager.unregister_many([node['node_id'] for node in remaining])
+        assert manager.get_network_size() == 49 - len(remaining)
+        manager.close()
+    
+    print("✅ TEST 7 PASSED\n")
+
+
+def test_account_block_store():
+    """Test lưu blockchain tài khoản: append-only, fork, migrate định dạng cũ, phục hồi"""
+    import json
+    import config
+    
+    print("\n" + "="*80)
+    print("TEST 8: ACCOUNT BLOCK STORE")
+    print("="*80)
+    
+    original_dir = config.ACCOUNTS_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        config.ACCOUNTS_DIR = tmp
+        try:
+            user_manager = UserManager()
+            user_manager.register("store_user", "pw")
+            store = user_manager.get_block_store("store_user")
+            assert len(store) == 1, "Genesis block should be stored"
+            assert 'blockchain' not in user_manager.get_account_data("store_user")
+            
+            # Mine thêm block -> chỉ append, file tài khoản không đổi
+            blockchain = user_manager.load_blockchain("store_user")
+            blockchain.difficulty = 1
+            account_mtime = os.stat(user_manager.get_account_file("store_user")).st_mtime_ns
+            for i in range(5):
+                blockchain.mempool.add(Transaction("System", f"User_{i}", 1, timestamp=1700000000.0 + i))
+                blockchain.mine_pending_transactions("Miner")
+                segment_size = os.path.getsize(store.path)
+                user_manager.save_blockchain("store_user", blockchain)
+                assert os.path.getsize(store.path) > segment_size
+            
+            assert len(store) == 6
+            assert os.stat(user_manager.get_account_file("store_user")).st_mtime_ns == account_mtime
+            assert store.read(3) == blockchain.chain[3].to_dict()
+            loaded = user_manager.load_blockchain("store_user")
+            assert [b.hash for b in loaded.chain] == [b.hash for b in blockchain.chain]
+            print(f"✓ 5 blocks appended, account file untouched")
+            
+            # Chain bị thay bởi fork khác -> cắt tại điểm fork rồi append
+            fork = Blockchain.from_list(blockchain.to_list()[:3], owner_address="store_user")
+            fork.difficulty = 1
+            fork.mempool.add(Transaction("System", "Fork", 2, timestamp=1800000000.0))
+            fork.mine_pending_transactions("Miner")
+            user_manager.save_blockchain("store_user", fork)
+            assert len(store) == 4 and store.get_hash(3) == fork.chain[3].hash
+            print(f"✓ Fork truncated at height 3")
+            
+            # Ghi dở (crash giữa chừng) -> phần đuôi bị bỏ khi mở lại
+            segment_size = os.path.getsize(store.path)
+            with open(store.path, 'ab') as f:
+                f.write(b'\x00\x00\x10\x00partial')
+            assert len(user_manager.get_block_store("store_user")) == 4
+            assert os.path.getsize(store.path) == segment_size
+            print(f"✓ Trailing partial record discarded")
+            
+            # Định dạng cũ (blockchain nằm trong file tài khoản) -> tự migrate
+            with open(user_manager.get_account_file("legacy_user"), 'w', encoding='utf-8') as f:
+                json.dump({'username': 'legacy_user', 'password': 'pw', 'node_id': None,
+                           'blockchain': blockchain.to_list()}, f)
+            success, _, account_data = user_manager.login("legacy_user", "pw")
+            assert success and 'blockchain' not in account_data
+            assert len(user_manager.get_block_store("legacy_user")) == len(blockchain.chain)
+            print(f"✓ Legacy account migrated to block store")
+            
+            user_manager.delete_account("store_user")
+            assert not os.path.exists(store.path)
+        finally:
+            config.ACCOUNTS_DIR = original_dir
+    
+    print("✅ TEST 8 PASSED\n")
+
+
+def test_lazy_chain_view():
+    """Test chain load lazy từ block store: không hash lại, LRU giới hạn, sửa đuôi chain"""
+    from core.block import Block
+    from core.block_store import BlockStore
+    
+    print("\n" + "="*80)
+    print("TEST 9: LAZY CHAIN VIEW")
+    print("="*80)
+    
+    blockchain = Blockchain(owner_address="Alice")
+    blockchain.difficulty = 1
+    for i in range(30):
+        blockchain.mempool.add(Transaction("System", f"User_{i}", 1, timestamp=1700000000.0 + i))
+        blockchain.mine_pending_transactions("Miner")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BlockStore(os.path.join(tmp, 'alice.chain'))
+        store.sync(blockchain.chain)
+        
+        # Load không giải mã block nào, from_dict không tính lại hash
+        hash_calls = []
+        original_calculate = Block.calculate_hash
+        Block.calculate_hash = lambda self: hash_calls.append(1) or original_calculate(self)
+        try:
+            loaded = Blockchain.from_store(store, owner_address="Alice")
+            loaded.difficulty = 1
+            assert len(loaded.chain._cache) == 0
+            assert loaded.chain[-1].hash == blockchain.chain[-1].hash
+            assert not hash_calls, "from_dict should not recompute hashes"
+        finally:
+            Block.calculate_hash = original_calculate
+        print(f"✓ Loaded {len(loaded.chain)} blocks lazily, no hash recomputation")
+        
+        # LRU giới hạn số Block giữ trong bộ nhớ
+        loaded.chain.cache_size = 4
+        for i in range(len(loaded.chain)):
+            assert loaded.chain[i].hash == blockchain.chain[i].hash
+        assert len(loaded.chain._cache) <= 4
+        assert loaded.get_balance("Miner") == blockchain.get_balance("Miner")
+        assert loaded.is_chain_valid(full=True)
+        print(f"✓ Random access/validation with LRU of {len(loaded.chain._cache)} blocks")
+        
+        # Fork: cắt đuôi rồi nối block mới, store chỉ ghi lại phần khác
+        loaded.replace_suffix(10, [])
+        assert len(loaded.chain) == 10 and loaded.get_balance("Miner") == 9 * loaded.mining_reward
+        loaded.mempool.add(Transaction("System", "Fork", 1, timestamp=1800000000.0))
+        loaded.mine_pending_transactions("Miner")
+        assert loaded.chain[10].previous_hash == blockchain.chain[9].hash
+        assert store.sync(loaded.chain) == (21, 1)
+        assert [b.hash for b in loaded.chain] == [store.get_hash(i) for i in range(len(store))]
+        loaded.chain.close()
+        print(f"✓ Fork at height 10 persisted (21 removed, 1 appended)")
+    
+    print("✅ TEST 9 PASSED\n")
+
+
+def test_binary_codec():
+    """Test codec nhị phân: round-trip giữ nguyên hash, negotiation với fallback JSON"""
+    import json
+    from flask import request
+    from core import codec
+    from core.block import Block
+    
+    print("\n" + "="*80)
+    print("TEST 10: BINARY CODEC")
+    print("="*80)
+    
+    blockchain = Blockchain(owner_address="Alice")
+    blockchain.difficulty = 1
+    blockchain.mempool.add(Transaction("System", "Bob", 5, timestamp=1700000000.0))
+    blockchain.mempool.add(Transaction("System", "Carol", 2.5, timestamp=1700000001))
+    blockchain.mine_pending_transactions("Miner")
+    legacy = Block(index=2, transaction=Transaction("Alice", "Bob", 1, timestamp=1.0),
+                   previous_hash=blockchain.chain[-1].hash, timestamp=1700000002.5)
+    blocks = list(blockchain.chain) + [legacy]
+    
+    # Round-trip: giữ đúng kiểu int/float, genesis previous_hash '0', hash JSON không đổi
+    decoded = codec.decode_blocks(codec.encode_blocks(blocks))
+    assert [b.to_dict() for b in decoded] == [b.to_dict() for b in blocks]
+    assert all(type(a.transactions[i].amount) is type(b.transactions[i].amount)
+               for a, b in zip(decoded, blocks) for i in range(len(b.transactions)))
+    assert all(b.hash == b.calculate_hash() for b in decoded)
+    tx = codec.decode_transaction(codec.encode_transaction(blocks[1].transactions[0]))
+    assert tx.to_dict() == blocks[1].transactions[0].to_dict()
+    binary_size = len(codec.encode_blocks(blocks))
+    json_size = len(json.dumps([b.to_dict() for b in blocks]))
+    assert binary_size < json_size
+    print(f"✓ Round-trip identical, {binary_size} bytes vs {json_size} bytes JSON")
+    
+    # Negotiation trên /chain: JSON mặc định, nhị phân khi Accept yêu cầu
+    node1 = Node(username="CodecSender")
+    node1.start()
+    node2 = Node(username="CodecReceiver")  # Tạo sau khi node1 chạy để không trùng port
+    received_types = []
+    node2.app.before_request(lambda: received_types.append(request.mimetype) and None)
+    
+    client = node1.app.test_client()
+    assert client.get('/chain').mimetype == 'application/json'
+    response = client.get('/chain', headers=Node._accept_header())
+    assert response.mimetype == codec.CONTENT_TYPE
+    assert response.headers[codec.CODEC_HEADER] == codec.CODEC_NAME
+    assert [b.hash for b in codec.decode_blocks(response.data)] == [b.hash for b in node1.blockchain.chain]
+    print(f"✓ /chain negotiated ({len(response.data)} bytes binary)")
+    
+    # Broadcast: JSON cho peer chưa biết, nhị phân sau khi peer báo hỗ trợ
+    node2.start()
+    time.sleep(1)
+    try:
+        node1.peers[node2.node_id] = node2.get_url()
+        node1.peer_client._binary_peers.clear()
+        tx = Transaction("System", node2.username, 1)
+        assert node1.broadcast_transaction(tx)[node2.node_id]['ok']
+        assert received_types[-1] == 'application/json'
+        assert node1.peer_client.supports_binary(node2.get_url())
+        
+        tx = Transaction("System", node2.username, 2)
+        assert node1.broadcast_transaction(tx)[node2.node_id]['ok']
+        assert received_types[-1] == codec.CONTENT_TYPE
+        assert len(node2.blockchain.pending_transactions) == 2
+        print(f"✓ Broadcast falls back to JSON, then switches to binary")
+    finally:
+        node1.stop()
+        node2.stop()
+    
+    print("✅ TEST 10 PASSED\n")
+
+
+def test_chain_streaming():
+    """Test /chain phân trang + stream (JSON/NDJSON/nhị phân), /resolve chỉ trả tóm tắt"""
+    import json
+    import config
+    from core import codec
+    from network.node import NDJSON_CONTENT_TYPE
+    
+    print("\n" + "="*80)
+    print("TEST 11: CHAIN STREAMING")
+    print("="*80)
+    
+    node1 = Node(username="StreamSource")
+    node1.blockchain.difficulty = 1
+    for i in range(30):
+        node1.blockchain.mempool.add(Transaction("System", f"User_{i}", 1, timestamp=1700000000.0 + i))
+        node1.blockchain.mine_pending_transactions("Miner")
+    hashes = [block.hash for block in node1.blockchain.chain]
+    
+    # Range: from/to/limit, 'length' luôn là độ dài cả chain
+    client = node1.app.test_client()
+    data = client.get('/chain?from=5&limit=10').get_json()
+    assert [b['hash'] for b in data['chain']] == hashes[5:15] and data['length'] == 31
+    data = client.get('/chain?from=25&to=100').get_json()
+    assert [b['hash'] for b in data['chain']] == hashes[25:]
+    assert client.get('/chain').get_json()['length'] == len(client.get('/chain').get_json()['chain']) == 31
+    
+    response = client.get('/chain?from=10&to=20', headers={'Accept': NDJSON_CONTENT_TYPE})
+    assert response.mimetype == NDJSON_CONTENT_TYPE
+    assert [json.loads(line)['hash'] for line in response.data.splitlines()] == hashes[10:20]
+    response = client.get('/chain?from=10&to=20', headers={'Accept': codec.CONTENT_TYPE})
+    assert [b.hash for b in codec.decode_blocks(response.data)] == hashes[10:20]
+    print(f"✓ /chain ranges served as JSON, NDJSON and binary")
+    
+    # Giải mã dần: block được yield trước khi nhận hết payload, payload cụt bị báo lỗi
+    payload = codec.encode_blocks(node1.blockchain.chain)
+    chunks = [payload[i:i + 7] for i in range(0, len(payload), 7)]
+    stream = codec.iter_decode_blocks(iter(chunks))
+    assert next(stream).hash == hashes[0]
+    assert [b.hash for b in stream] == hashes[1:]
+    try:
+        list(codec.iter_decode_blocks([payload[:-3]]))
+        assert False, "Truncated stream must be rejected"
+    except ValueError:
+        pass
+    print(f"✓ Incremental decoding ({len(chunks)} chunks), truncation detected")
+    
+    # Qua HTTP thật: response được stream (chunked), node ngắn hơn đồng bộ qua stream
+    node1.start()
+    node2 = Node(username="StreamSink")  # Tạo sau khi node1 chạy để không trùng port
+    node2.blockchain.difficulty = 1
+    node2.start()
+    time.sleep(1)
+    try:
+        response = node2.peer_client.get(node1.get_url(), '/chain', stream=True)
+        assert response.headers.get('Transfer-Encoding') == 'chunked'
+        response.close()
+        
+        for binary in (True, False):
+            original = config.BINARY_CODEC
+            config.BINARY_CODEC = binary
+            try:
+                blocks = node2.request_chain(node1.get_url(), 3, 9)
+            finally:
+                config.BINARY_CODEC = original
+            assert [b.hash for b in blocks] == hashes[3:9]
+        
+        node2.peers[node1.node_id] = node1.get_url()
+        summary = node2.app.test_client().post('/resolve').get_json()
+        assert summary['replaced'] and summary['length'] == 31 and summary['tip'] == hashes[-1]
+        assert 'chain' not in summary and 'new_chain' not in summary
+        assert [b.hash for b in node2.blockchain.chain] == hashes
+        print(f"✓ Streamed sync replaced chain, /resolve returned summary only")
+    finally:
+        node1.stop()
+        node2.stop()
+    
+    print("✅ TEST 11 PASSED\n")
+
+
 def run_all_tests():
     """Chạy tất cả tests"""
     print("\n" + "="*80)
@@ -190,13 +576,19 @@ def run_all_tests():
         test_network()
         test_transaction_broadcast()
         test_mining()
+        test_registry_batch()
+        test_registry_sqlite()
+        test_account_block_store()
+        test_lazy_chain_view()
+        test_binary_codec()
+        test_chain_streaming()
         
         print("\n" + "="*80)
         print("✅ ALL TESTS PASSED!")
         print("="*80)
         print("\nHệ thống hoạt động tốt! Có thể chạy main.py")
         print("="*80 + "\n")
-        
+    
     except AssertionError as e:
         print(f"\n❌ TEST FAILED: {str(e)}")
         import traceback